@@ -0,0 +1,208 @@
+import threading
+import time
+import numpy as np
+import torch
+from test import GalacticShooterAI, Direction
+from model_test import Linear_QNet
+from agent_test import Agent, BATCH_SIZE, PRIORITIZED, STATE_SIZE, N_ALIENS, N_BULLETS
+from features import FeatureEncoder
+from checkpoint import CheckpointManager
+from metrics import MetricsSink
+
+# Actor/learner version of agent_test.train. Actor threads step their own
+# headless games with a private copy of the network and push transitions into
+# the agent's replay memory; a learner thread samples batches at its own pace
+# and publishes weight snapshots that the actors pick up between steps.
+# Threads rather than processes: the replay memory stays in one place and
+# torch releases the GIL inside its kernels, so acting and learning overlap.
+
+# separate from agent_test's: the two trainers number checkpoints by game
+# and record different metrics
+CHECKPOINT_DIR = './model/actor_learner_checkpoints'
+METRICS_PATH = './model/actor_learner_metrics.jsonl'
+RESUME = False
+
+
+class WeightStore:
+    def __init__(self, model):
+        self.lock = threading.Lock()
+        self.version = 0
+        self.state = self._snapshot(model)
+
+    @staticmethod
+    def _snapshot(model):
+        return {k: v.detach().clone() for k, v in model.state_dict().items()}
+
+    def publish(self, model):
+        state = self._snapshot(model)
+        with self.lock:
+            self.state = state
+            self.version += 1
+
+    def latest(self):
+        with self.lock:
+            return self.version, self.state
+
+
+class Actor(threading.Thread):
+    def __init__(self, agent, weights, memory_lock, stats, n_envs, seed, stop):
+        super().__init__(daemon=True)
+        self.agent = agent
+        self.weights = weights
+        self.memory_lock = memory_lock
+        self.stats = stats
+        self.stop = stop
+        self.games = [GalacticShooterAI(headless=True, seed=seed + i) for i in range(n_envs)]
+        self.model = Linear_QNet(STATE_SIZE, 256, 4)
+        # own encoder: its scratch buffers must not be shared between threads
+        self.encoder = FeatureEncoder(N_ALIENS, N_BULLETS)
+        self.version = -1
+        self.steps = 0
+
+    def sync(self):
+        version, state = self.weights.latest()
+        if version != self.version:
+            self.model.load_state_dict(state)
+            self.version = version
+
+    def run(self):
+        states = np.zeros((len(self.games), STATE_SIZE), dtype=np.float32)
+        next_states = np.zeros_like(states)
+        self.encoder.encode_batch(self.games, states)
+        while not self.stop.is_set():
+            self.sync()
+            moves = self.agent.get_actions(states, model=self.model)
+            transitions = []
+            for i, game in enumerate(self.games):
+                reward, done, score = game.play_step(Direction(int(moves[i])))
+                self.encoder.encode(game, next_states[i])
+                transitions.append((i, moves[i], reward, done))
+                if done:
+                    self.stats.game_over(score)
+                    game.reset()
+            with self.memory_lock:
+                for i, move, reward, done in transitions:
+                    self.agent.memory.add(states[i], move, reward, next_states[i], done)
+            states[:] = next_states
+            # games that just ended start the next step from their reset state
+            for i, _, _, done in transitions:
+                if done:
+                    self.encoder.encode(self.games[i], states[i])
+            self.steps += len(self.games)
+
+
+class Learner(threading.Thread):
+    def __init__(self, agent, weights, memory_lock, actors, train_every, publish_every, stop):
+        super().__init__(daemon=True)
+        self.agent = agent
+        self.weights = weights
+        self.memory_lock = memory_lock
+        self.actors = actors
+        self.train_every = train_every
+        self.publish_every = publish_every
+        self.stop = stop
+        self.updates = 0
+        # held for each update, so a checkpoint sees the model and optimizer
+        # between steps
+        self.update_lock = threading.Lock()
+
+    def run(self):
+        while not self.stop.is_set():
+            collected = sum(actor.steps for actor in self.actors)
+            # at most one update per train_every collected transitions
+            if len(self.agent.memory) < BATCH_SIZE or (self.train_every and self.updates * self.train_every >= collected):
+                time.sleep(0.001)
+                continue
+            with self.update_lock:
+                with self.memory_lock:
+                    batch = self.agent.memory.sample(BATCH_SIZE)
+                td_errors = self.agent.trainer.train_step(batch.states, batch.actions, batch.rewards,
+                                                          batch.next_states, batch.dones, weights=batch.weights)
+                if PRIORITIZED:
+                    with self.memory_lock:
+                        self.agent.memory.update_priorities(batch.indices, td_errors.numpy())
+            self.updates += 1
+            if self.updates % self.publish_every == 0:
+                self.weights.publish(self.agent.model)
+
+
+class Stats:
+    def __init__(self, agent):
+        self.agent = agent
+        self.lock = threading.Lock()
+        self.total_score = 0
+        self.record = 0
+        self.new_record = False
+
+    def game_over(self, score):
+        with self.lock:
+            self.agent.n_games += 1
+            self.total_score += score
+            if score > self.record:
+                self.record = score
+                self.new_record = True
+
+
+def train(n_actors=2, envs_per_actor=4, train_every=4, publish_every=50, report_every=5.0, duration=None,
+          resume=RESUME):
+    agent = Agent()
+    checkpoints = CheckpointManager(CHECKPOINT_DIR)
+    stats = Stats(agent)
+    if resume:
+        checkpoint = checkpoints.load()
+        if checkpoint is not None:
+            agent.load_state_dict(checkpoint['state'])
+            stats.record = checkpoint['state']['record']
+    weights = WeightStore(agent.model)
+    memory_lock = threading.Lock()
+    stop = threading.Event()
+
+    actors = [Actor(agent, weights, memory_lock, stats, envs_per_actor, seed=i * envs_per_actor, stop=stop)
+              for i in range(n_actors)]
+    learner = Learner(agent, weights, memory_lock, actors, train_every, publish_every, stop)
+    for thread in actors + [learner]:
+        thread.start()
+
+    metrics = MetricsSink(METRICS_PATH)
+    start = last = time.perf_counter()
+    last_steps = last_updates = 0
+    try:
+        while duration is None or time.perf_counter() - start < duration:
+            time.sleep(report_every)
+            now = time.perf_counter()
+            steps = sum(actor.steps for actor in actors)
+            updates = learner.updates
+            with stats.lock:
+                n_games, total_score, record = agent.n_games, stats.total_score, stats.record
+                new_record, stats.new_record = stats.new_record, False
+            if new_record:
+                # model, optimizer and replay memory, like agent_test; save()
+                # snapshots them before the locks are let go
+                with learner.update_lock, memory_lock:
+                    state = dict(agent.state_dict(), n_games=n_games, record=record)
+                    checkpoints.save(state, step=n_games, score=record)
+            mean_score = total_score / n_games if n_games else 0
+            steps_per_sec = (steps - last_steps) / (now - last)
+            updates_per_sec = (updates - last_updates) / (now - last)
+            loss = agent.trainer.last_loss
+            metrics.record(game=n_games, mean_score=mean_score, steps_per_sec=steps_per_sec,
+                           updates_per_sec=updates_per_sec, loss=None if loss is None else loss.item())
+            print(f'Games {n_games} Mean score {mean_score:.2f} Record {record} | '
+                  f'actors {steps_per_sec:.0f} steps/s | learner {updates_per_sec:.1f} updates/s')
+            last, last_steps, last_updates = now, steps, updates
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for thread in actors + [learner]:
+            thread.join()
+        checkpoints.close()
+        metrics.close()
+    return agent
+
+
+if __name__ == '__main__':
+    # actors and learner already run in parallel; keep torch from
+    # oversubscribing the cores with its own thread pool on top
+    torch.set_num_threads(1)
+    train()
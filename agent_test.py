@@ -1,112 +1,165 @@
-import torch
+import time
 import random
 import numpy as np
-from collections import deque
 from test import GalacticShooterAI, Direction
 from model_test import Linear_QNet, QTrainer
-from helper import plot
+from metrics import MetricsSink
+from replay import ReplayBuffer, PrioritizedReplayBuffer
+from checkpoint import CheckpointManager
+from features import FeatureEncoder
+from profiler import Profiler
+from recorder import EpisodeRecorder
 
 MAX_MEMORY = 100_000
 BATCH_SIZE = 1000
 LR = 0.001
+HEADLESS = True
+PRIORITIZED = False
+TARGET_UPDATE = 0
+DOUBLE_DQN = False
+CHECKPOINT_DIR = './model/checkpoints'
+CHECKPOINT_EVERY = 50
+RESUME = False
+METRICS_PATH = './model/metrics.jsonl'
+# start helper.py in its own process to plot METRICS_PATH while training
+LIVE_PLOT = False
+# write a per-phase step profile here at the end of training
+# (print it with python profiler.py PATH); None disables profiling
+PROFILE_PATH = None
+# append every episode (seed + packed actions) here; replay or verify them
+# with python recorder.py; None disables recording
+RECORD_PATH = None
+# nearest aliens/bullets seen by the agent; the state size follows from them
+N_ALIENS = 3
+N_BULLETS = 2
+STATE_SIZE = FeatureEncoder(N_ALIENS, N_BULLETS).size
 
 class Agent:
     def __init__(self):
         self.n_games = 0
         self.epsilon = 0
         self.gamma = 0.9
-        self.memory = deque(maxlen=MAX_MEMORY)
-        self.model = Linear_QNet(7, 256, 4)
-        self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma)
-
-    def get_state(self, game):
-        player = game.player
-
-        state = [
-            player.rect.x,
-            player.rect.y,
-            player.speed_x,
-            game.aliens.sprites()[0].rect.x if len(game.aliens) > 0 else 0,
-            game.aliens.sprites()[0].rect.y if len(game.aliens) > 0 else 0,
-            game.score,
-            game.lives,
-        ]
-        return np.array(state, dtype=int)
+        if PRIORITIZED:
+            self.memory = PrioritizedReplayBuffer(MAX_MEMORY, STATE_SIZE)
+        else:
+            self.memory = ReplayBuffer(MAX_MEMORY, STATE_SIZE)
+        self.model = Linear_QNet(STATE_SIZE, 256, 4)
+        self.encoder = FeatureEncoder(N_ALIENS, N_BULLETS)
+        self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma,
+                                target_update=TARGET_UPDATE, double=DOUBLE_DQN)
+
+    def state_dict(self):
+        return {
+            'model': self.model.state_dict(),
+            'optimizer': self.trainer.optimizer.state_dict(),
+            'memory': self.memory.state_dict(),
+            'n_games': self.n_games,
+        }
+
+    def load_state_dict(self, state):
+        self.model.load_state_dict(state['model'])
+        self.trainer.target_model.load_state_dict(state['model'])
+        self.trainer.optimizer.load_state_dict(state['optimizer'])
+        self.memory.load_state_dict(state['memory'])
+        self.n_games = state['n_games']
+
+    def get_state(self, game, out=None):
+        return self.encoder.encode(game, out)
 
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
 
     def train_long_memory(self):
-        if len(self.memory) > BATCH_SIZE:
-            mini_sample = random.sample(self.memory, BATCH_SIZE)
-        else:
-            mini_sample = self.memory
-
-        states, actions, rewards, next_states, dones = zip(*mini_sample)
-        self.trainer.train_step(states, actions, rewards, next_states, dones)
+        batch = self.memory.sample(BATCH_SIZE)
+        td_errors = self.trainer.train_step(batch.states, batch.actions, batch.rewards,
+                                            batch.next_states, batch.dones, weights=batch.weights)
+        if PRIORITIZED:
+            self.memory.update_priorities(batch.indices, td_errors.numpy())
 
     def train_short_memory(self, state, action, reward, next_state, done):
         self.trainer.train_step(state, action, reward, next_state, done)
 
     def get_action(self, state):
-        self.epsilon = 80 - self.n_games
-        final_move = [0, 0, 0, 0]
-        if random.randint(0, 200) < self.epsilon:
-            move = random.randint(0, 3)
-            final_move[move] = 1
-        else:
-            state0 = torch.tensor(state, dtype=torch.float)
-            prediction = self.model(state0)
-            move = torch.argmax(prediction).item()
-            final_move[move] = 1
+        return int(self.get_actions(state)[0])
 
-        return final_move
+    def get_actions(self, states, model=None):
+        # one epsilon-greedy action index per row of states; actors pass
+        # their own copy of the weights as model
+        self.epsilon = 80 - self.n_games
+        moves = (model or self.model).act(states)
+        for i in range(len(moves)):
+            if random.randint(0, 200) < self.epsilon:
+                moves[i] = random.randint(0, 3)
+        return moves
 
-def train():
-    plot_scores = []
-    plot_mean_scores = []
+def train(resume=RESUME):
     total_score = 0
     record = 0
     agent = Agent()
-    game = GalacticShooterAI()
-    while True:
-        state_old = agent.get_state(game)
-        final_move = agent.get_action(state_old)
-        
-
-        action = Direction.DO_NOTHING
-        if final_move[0] == 1:
-            action = Direction.LEFT
-        elif final_move[1] == 1:
-            action = Direction.RIGHT
-        elif final_move[2] == 1:
-            action = Direction.SHOOT
-        elif final_move[3] == 1:
-            action = Direction.DO_NOTHING
-
-
-        reward, done, score = game.play_step(action)
-        state_new = agent.get_state(game)
-
-        agent.train_short_memory(state_old, final_move, reward, state_new, done)
-        agent.remember(state_old, final_move, reward, state_new, done)
-
-        if done:
-            game.reset()
-            agent.n_games += 1
-            agent.train_long_memory()
-
-            if score > record:
-                record = score
-                agent.model.save()
-
-            print('Game', agent.n_games, 'Score', score, 'Record:', record)
-
-            plot_scores.append(score)
-            total_score += score
-            mean_score = total_score / agent.n_games
-            plot_mean_scores.append(mean_score)
-            plot(plot_scores, plot_mean_scores)
+    checkpoints = CheckpointManager(CHECKPOINT_DIR)
+    if resume:
+        checkpoint = checkpoints.load()
+        if checkpoint is not None:
+            agent.load_state_dict(checkpoint['state'])
+            record = checkpoint['state']['record']
+    game = GalacticShooterAI(headless=HEADLESS)
+    prof = game.profiler = Profiler() if PROFILE_PATH else None
+    recorder = EpisodeRecorder(RECORD_PATH) if RECORD_PATH else None
+    if recorder is not None:
+        recorder.attach(game)
+    metrics = MetricsSink(METRICS_PATH, live=LIVE_PLOT)
+    steps = 0
+    episode_start = time.perf_counter()
+    # two preallocated state buffers, swapped every tick; memory.add copies
+    # them, so nothing is allocated per step
+    state_old = np.zeros(STATE_SIZE, dtype=np.float32)
+    state_new = np.zeros_like(state_old)
+    agent.get_state(game, state_old)
+    try:
+        while True:
+            final_move = agent.get_action(state_old)
+            if prof is not None:
+                prof.lap('act')
+
+            reward, done, score = game.play_step(Direction(final_move))
+            agent.get_state(game, state_new)
+
+            agent.train_short_memory(state_old, final_move, reward, state_new, done)
+            agent.remember(state_old, final_move, reward, state_new, done)
+            steps += 1
+            if prof is not None:
+                prof.lap('learn')
+
+            if done:
+                game.reset()
+                agent.get_state(game, state_new)
+                agent.n_games += 1
+                agent.train_long_memory()
+
+                if score > record or agent.n_games % CHECKPOINT_EVERY == 0:
+                    record = max(record, score)
+                    checkpoints.save(dict(agent.state_dict(), record=record), step=agent.n_games, score=score)
+
+                print('Game', agent.n_games, 'Score', score, 'Record:', record)
+
+                total_score += score
+                mean_score = total_score / agent.n_games
+                now = time.perf_counter()
+                metrics.record(game=agent.n_games, score=score, mean_score=mean_score,
+                               steps_per_sec=steps / (now - episode_start),
+                               loss=agent.trainer.last_loss.item())
+                steps = 0
+                episode_start = now
+                if prof is not None:
+                    prof.lap('episode_end')
+            state_old, state_new = state_new, state_old
+    finally:
+        checkpoints.close()
+        metrics.close()
+        if prof is not None:
+            prof.save(PROFILE_PATH)
+        if recorder is not None:
+            recorder.close()
 
 if __name__ == '__main__':
     train()
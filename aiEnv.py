@@ -1,11 +1,13 @@
 import pygame
 import random
-import os
 import numpy as np
-import cv2
 from enum import Enum
 import gym
 from gym import spaces
+import assets
+from obsRenderer import ObsRenderer, ObsPipeline
+from collision import groupcollide
+from pool import Pool, PooledSprite
 
 # Параметры игры
 SCREEN_WIDTH = 800
@@ -13,18 +15,6 @@ SCREEN_HEIGHT = 600
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 
-# Инициализация Pygame
-pygame.init()
-font = pygame.font.Font(None, 25)
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Infinite Galactic Shooter")
-
-# Загрузка изображений
-player_image = pygame.image.load(os.path.join("images", "rocket-ship.png")).convert_alpha()
-player_image = pygame.transform.scale(player_image, (50, 50))
-alien_image = pygame.image.load(os.path.join("images", "space-invaders.png")).convert_alpha()
-alien_image = pygame.transform.scale(alien_image, (40, 40))
-
 class Direction(Enum):
     LEFT = 0
     RIGHT = 1
@@ -34,7 +24,7 @@ class Direction(Enum):
 class Player(pygame.sprite.Sprite):
     def __init__(self):
         super().__init__()
-        self.image = player_image
+        self.image = assets.image("rocket-ship.png", (50, 50))
         self.rect = self.image.get_rect()
         self.rect.centerx = SCREEN_WIDTH // 2
         self.rect.bottom = SCREEN_HEIGHT - 10
@@ -44,54 +34,80 @@ class Player(pygame.sprite.Sprite):
         self.rect.x += self.speed_x
         self.rect.x = max(0, min(SCREEN_WIDTH - self.rect.width, self.rect.x))
 
-    def shoot(self, bullets, all_sprites):
-        bullet = Bullet(self.rect.centerx, self.rect.top)
+    def shoot(self, bullets, all_sprites, pool=None):
+        if pool is None:
+            bullet = Bullet(self.rect.centerx, self.rect.top)
+        else:
+            bullet = pool.get(self.rect.centerx, self.rect.top)
         all_sprites.add(bullet)
         bullets.add(bullet)
 
-class Bullet(pygame.sprite.Sprite):
+class Bullet(PooledSprite):
     def __init__(self, x, y):
         super().__init__()
-        self.image = pygame.Surface((3, 15))
-        self.image.fill((255, 0, 0))
+        # одна поверхность на все пули
+        self.image = assets.solid((3, 15), (255, 0, 0))
         self.rect = self.image.get_rect()
+        self.speed_y = -10
+        self.spawn(x, y)
+
+    def spawn(self, x, y):
         self.rect.centerx = x
         self.rect.bottom = y
-        self.speed_y = -10
 
     def update(self):
         self.rect.y += self.speed_y
         if self.rect.bottom < 0:
             self.kill()
 
-class Alien(pygame.sprite.Sprite):
-    def __init__(self):
+class Alien(PooledSprite):
+    def __init__(self, rng=random):
         super().__init__()
-        self.image = alien_image
+        self.image = assets.image("space-invaders.png", (40, 40))
         self.rect = self.image.get_rect()
-        self.rect.x = random.randrange(SCREEN_WIDTH - self.rect.width)
-        self.rect.y = random.randrange(-100, -40)
-        self.speed_y = random.randrange(1, 2)
+        self.rng = rng
+        self.spawn()
+
+    def spawn(self):
+        self.rect.x = self.rng.randrange(SCREEN_WIDTH - self.rect.width)
+        self.rect.y = self.rng.randrange(-100, -40)
+        self.speed_y = self.rng.randrange(1, 2)
 
     def update(self):
         self.rect.y += self.speed_y
         if self.rect.top > SCREEN_HEIGHT:
-            self.rect.x = random.randrange(SCREEN_WIDTH - self.rect.width)
-            self.rect.y = random.randrange(-100, -40)
-            self.speed_y = random.randrange(1, 2)
+            self.spawn()
 
 class GalacticShooterEnv(gym.Env):
-    def __init__(self):
+    def __init__(self, obs_mode="raster"):
         super(GalacticShooterEnv, self).__init__()
         self.action_space = spaces.Discrete(4)
         self.observation_space = spaces.Box(low=0, high=255, shape=(84, 84, 1), dtype=np.uint8)
+        # "raster" draws the sprites straight into the 84x84 observation,
+        # "screen" downscales the last frame shown on the display
+        self.obs_mode = obs_mode
+        # окно открывается при создании среды, а не при импорте
+        self.screen = assets.window()
+        self.renderer = ObsRenderer(mask_bullets=False)
+        self.pipeline = ObsPipeline(mask_bullets=False)
+        # собственный генератор случайных чисел для каждого окружения
+        self.rng = random.Random()
+        # убитые пули и пришельцы используются повторно
+        self.bullet_pool = Pool(Bullet)
+        self.alien_pool = Pool(lambda: Alien(self.rng))
+        self.all_sprites = pygame.sprite.Group()
+        self.aliens = pygame.sprite.Group()
+        self.bullets = pygame.sprite.Group()
         self.reset()
 
-    def reset(self):
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng.seed(seed)
+        for sprite in self.bullets.sprites() + self.aliens.sprites():
+            sprite.kill()
+        self.all_sprites.empty()
         self.player = Player()
-        self.all_sprites = pygame.sprite.Group(self.player)
-        self.aliens = pygame.sprite.Group()
-        self.bullets = pygame.sprite.Group()
+        self.all_sprites.add(self.player)
         self.score = 0
         self.lives = 3
         self.steps_survived = 0
@@ -100,17 +116,16 @@ class GalacticShooterEnv(gym.Env):
         return self._get_obs()
 
     def place_alien(self):
-        alien = Alien()
+        alien = self.alien_pool.get()
         self.all_sprites.add(alien)
         self.aliens.add(alien)
 
     def _get_obs(self):
-        raw_pixels = pygame.surfarray.array3d(pygame.display.get_surface())
-        raw_pixels = np.transpose(raw_pixels, (1, 0, 2))
-        gray_pixels = cv2.cvtColor(raw_pixels, cv2.COLOR_RGB2GRAY)
-        gray_pixels = cv2.resize(gray_pixels, (84, 84), interpolation=cv2.INTER_AREA)
-        obs = np.expand_dims(gray_pixels, axis=-1)
-        return obs
+        # both paths reuse their buffer, callers may keep what they get
+        if self.obs_mode == "raster":
+            return self.renderer.render(self).copy()
+
+        return self.pipeline(self.screen).copy()
 
     def step(self, action):
         for event in pygame.event.get():
@@ -141,13 +156,13 @@ class GalacticShooterEnv(gym.Env):
                 alien.kill()
                 
 
-        hits = pygame.sprite.groupcollide(self.bullets, self.aliens, True, True)
+        hits = groupcollide(self.bullets, self.aliens, True, True)
         for hit in hits:
             self.score += 1
             reward += 1
             self.place_alien()
 
-        if len(self.aliens) < 2 and random.random() < 0.02:
+        if len(self.aliens) < 2 and self.rng.random() < 0.02:
             self.place_alien()
 
         obs = self._get_obs()
@@ -161,8 +176,8 @@ class GalacticShooterEnv(gym.Env):
         return False
 
     def render(self, mode='human'):
-        screen.fill(BLACK)
-        self.all_sprites.draw(screen)
+        self.screen.fill(BLACK)
+        self.all_sprites.draw(self.screen)
         pygame.display.flip()
 
     def move(self, action):
@@ -171,7 +186,7 @@ class GalacticShooterEnv(gym.Env):
         elif action == Direction.RIGHT.value:
             self.player.speed_x = 5
         elif action == Direction.SHOOT.value:
-            self.player.shoot(self.bullets, self.all_sprites)
+            self.player.shoot(self.bullets, self.all_sprites, self.bullet_pool)
         elif action == Direction.DO_NOTHING.value:
             self.player.speed_x = 0
 
@@ -0,0 +1,83 @@
+import os
+import pygame
+
+# Window, images and fonts are created on first use rather than at import, so
+# importing test/aiEnv/main (for Direction, in a worker process, ...) opens no
+# window and reads no files. Headless games draw into an offscreen surface
+# and never initialise the display at all.
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+# when set, scaled images are also kept here as raw RGBA buffers, so later
+# runs skip PNG decoding and scaling; rebaked whenever the PNG is newer
+BAKE_DIR = os.environ.get("GALACTIC_ASSET_CACHE")
+
+SCREEN_SIZE = (800, 600)
+CAPTION = "Infinite Galactic Shooter"
+
+# (name, size) -> (surface, converted to the display format)
+_images = {}
+_fonts = {}
+_solids = {}
+
+
+def window(size=SCREEN_SIZE, caption=CAPTION):
+    # the display surface, opened by the first caller
+    surface = pygame.display.get_surface()
+    if surface is None:
+        pygame.display.init()
+        surface = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+    return surface
+
+
+def offscreen(size=SCREEN_SIZE):
+    return pygame.Surface(size)
+
+
+def image(name, size):
+    # Images cached before a window exists stay in their file format and are
+    # converted for fast blitting once there is one
+    key = (name, size)
+    entry = _images.get(key)
+    display = pygame.display.get_init() and pygame.display.get_surface() is not None
+    if entry is None or (display and not entry[1]):
+        surface = entry[0] if entry else _load(name, size)
+        if display:
+            surface = surface.convert_alpha()
+        entry = _images[key] = (surface, display)
+    return entry[0]
+
+
+def _load(name, size):
+    path = os.path.join(IMAGE_DIR, name)
+    baked = None
+    if BAKE_DIR:
+        baked = os.path.join(BAKE_DIR, f"{os.path.splitext(name)[0]}_{size[0]}x{size[1]}.rgba")
+        if os.path.exists(baked) and os.path.getmtime(baked) >= os.path.getmtime(path):
+            with open(baked, "rb") as file:
+                return pygame.image.frombytes(file.read(), size, "RGBA")
+    surface = pygame.transform.scale(pygame.image.load(path), size)
+    if baked:
+        os.makedirs(BAKE_DIR, exist_ok=True)
+        with open(baked + ".tmp", "wb") as file:
+            file.write(pygame.image.tobytes(surface, "RGBA"))
+        os.replace(baked + ".tmp", baked)
+    return surface
+
+
+def solid(size, color):
+    # one shared surface per size and colour, e.g. for all bullets
+    surface = _solids.get((size, color))
+    if surface is None:
+        surface = _solids[(size, color)] = pygame.Surface(size)
+        surface.fill(color)
+    return surface
+
+
+def font(size):
+    cached = _fonts.get(size)
+    if cached is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        cached = _fonts[size] = pygame.font.Font(None, size)
+    return cached
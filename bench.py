@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+# Throughput benchmarks for the game, observations and training code.
+# Every benchmark is a setup function registered with @benchmark: it builds
+# its fixtures from fixed seeds and returns (op, items), where op() does one
+# unit of work covering `items` items (steps, samples, frames). The runner
+# calibrates how many ops make up one round, times `repeat` rounds and
+# reports seconds per item; results can be saved as JSON and compared
+# against a stored baseline.
+#
+#   python bench.py                          run everything, print a table
+#   python bench.py -k obs -o results.json   only names containing "obs"
+#   python bench.py --baseline base.json     flag regressions against base.json
+
+BENCHMARKS = {}
+
+
+def benchmark(name, repeat=5, min_time=0.2):
+    def register(setup):
+        BENCHMARKS[name] = (setup, repeat, min_time)
+        return setup
+    return register
+
+
+def measure(setup, repeat, min_time):
+    op, items = setup()
+    op()
+    # ops per round: enough for one round to take at least min_time
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        if elapsed < min_time / 10:
+            number *= 10
+        else:
+            number = int(number * min_time / elapsed * 1.1) + 1
+    rounds = [elapsed]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        rounds.append(time.perf_counter() - start)
+    per_item = [r / (number * items) for r in rounds]
+    median = statistics.median(per_item)
+    return {
+        'median': median,
+        'min': min(per_item),
+        'stdev': statistics.stdev(per_item) if len(per_item) > 1 else 0.0,
+        'per_sec': 1 / median,
+        'rounds': len(rounds),
+        'number': number,
+        'items': items,
+    }
+
+
+def run(pattern=None, verbose=True):
+    results = {}
+    for name, (setup, repeat, min_time) in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(setup, repeat, min_time)
+        if verbose:
+            r = results[name]
+            print(f'{name:<28}{r["median"] * 1e6:>12.2f} us/item{r["per_sec"]:>14.1f} /s'
+                  f'  (+-{r["stdev"] / r["median"]:.1%})', flush=True)
+    return results
+
+
+def compare(results, baseline, threshold=0.10):
+    # names whose median got slower than baseline by more than threshold
+    regressions = []
+    for name, r in results.items():
+        if name not in baseline:
+            continue
+        change = r['median'] / baseline[name]['median'] - 1
+        flag = ''
+        if change > threshold:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            flag = 'faster'
+        print(f'{name:<28}{baseline[name]["median"] * 1e6:>12.2f} -> {r["median"] * 1e6:>10.2f} us/item'
+              f'{change:>+9.1%}  {flag}')
+    return regressions
+
+
+def environment():
+    import numpy as np
+    import torch
+    import pygame
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'torch': torch.__version__,
+        'pygame': pygame.version.ver,
+        'time': time.time(),
+    }
+
+
+def _actions(n=1000, seed=0):
+    rng = random.Random(seed)
+    return [rng.randrange(4) for _ in range(n)]
+
+
+def _play(game, draw):
+    from test import Direction
+    actions = [Direction(a) for a in _actions()]
+    state = {'i': 0}
+
+    def op():
+        i = state['i'] = (state['i'] + 1) % len(actions)
+        if game.play_step(actions[i])[1]:
+            game.reset()
+        if draw:
+            game.update_ui()
+    return op, 1
+
+
+@benchmark('play_step_headless')
+def play_step_headless():
+    from test import GalacticShooterAI
+    return _play(GalacticShooterAI(headless=True, seed=0), draw=False)
+
+
+@benchmark('play_step_rendered')
+def play_step_rendered():
+    # headless game plus an explicit update_ui(), i.e. drawing every frame
+    # offscreen without the 60 FPS clock.tick a windowed game would wait on
+    from test import GalacticShooterAI
+    return _play(GalacticShooterAI(headless=True, seed=0), draw=True)
+
+
+def _get_obs(obs_mode):
+    from model import GalacticShooterEnv
+    env = GalacticShooterEnv(obs_mode=obs_mode)
+    env.reset(seed=0)
+    for a in _actions(200):
+        if env.step(a)[2]:
+            env.reset(seed=0)
+    return env._get_obs, 1
+
+
+@benchmark('get_obs_raster')
+def get_obs_raster():
+    return _get_obs('raster')
+
+
+@benchmark('get_obs_screen')
+def get_obs_screen():
+    return _get_obs('screen')
+
+
+def _train_step(batch_size):
+    import numpy as np
+    import torch
+    from model_test import Linear_QNet, QTrainer
+    from agent_test import STATE_SIZE
+    torch.manual_seed(0)
+    rng = np.random.default_rng(0)
+    trainer = QTrainer(Linear_QNet(STATE_SIZE, 256, 4), lr=0.001, gamma=0.9)
+    states = rng.standard_normal((batch_size, STATE_SIZE)).astype(np.float32)
+    next_states = rng.standard_normal((batch_size, STATE_SIZE)).astype(np.float32)
+    actions = rng.integers(0, 4, batch_size)
+    rewards = rng.standard_normal(batch_size).astype(np.float32)
+    dones = rng.random(batch_size) < 0.01
+    if batch_size == 1:
+        # shape of agent_test's short-memory update: one unbatched transition
+        return lambda: trainer.train_step(states[0], int(actions[0]), float(rewards[0]),
+                                          next_states[0], bool(dones[0])), 1
+    return lambda: trainer.train_step(states, actions, rewards, next_states, dones), 1
+
+
+@benchmark('train_step_batch1')
+def train_step_batch1():
+    return _train_step(1)
+
+
+@benchmark('train_step_batch1000')
+def train_step_batch1000():
+    return _train_step(1000)
+
+
+def _replay(prioritized):
+    import numpy as np
+    from replay import ReplayBuffer, PrioritizedReplayBuffer
+    from agent_test import MAX_MEMORY, BATCH_SIZE, STATE_SIZE
+    rng = np.random.default_rng(0)
+    if prioritized:
+        memory = PrioritizedReplayBuffer(MAX_MEMORY, STATE_SIZE, seed=0)
+    else:
+        memory = ReplayBuffer(MAX_MEMORY, STATE_SIZE, seed=0)
+    state = np.zeros(STATE_SIZE, dtype=np.float32)
+    for i in range(MAX_MEMORY):
+        memory.add(state, i % 4, 0.0, state, False)
+    if prioritized:
+        memory.update_priorities(np.arange(MAX_MEMORY), rng.random(MAX_MEMORY))
+    return lambda: memory.sample(BATCH_SIZE), 1
+
+
+@benchmark('replay_sample')
+def replay_sample():
+    return _replay(False)
+
+
+@benchmark('replay_sample_prioritized')
+def replay_sample_prioritized():
+    return _replay(True)
+
+
+@benchmark('ppo_iteration', repeat=3, min_time=0)
+def ppo_iteration():
+    # one rollout of model.py's default numpy backend plus a single-epoch
+    # update, per collected frame
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.vec_env import VecMonitor
+    from vecEnv import GalacticShooterVectorEnv, SB3VecEnv
+    n_envs, n_steps = 64, 32
+    env = VecMonitor(SB3VecEnv(GalacticShooterVectorEnv(n_envs, seed=0)))
+    model = PPO('CnnPolicy', env, n_steps=n_steps, n_epochs=1, seed=0, device='cpu')
+    frames = n_envs * n_steps
+    return lambda: model.learn(total_timesteps=frames, reset_num_timesteps=False), frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Galactic Shooter benchmarks')
+    parser.add_argument('-k', dest='pattern', help='only run benchmarks whose name contains this')
+    parser.add_argument('-o', '--output', help='write results as JSON here')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative slowdown reported as a regression (default 0.10)')
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'environment': environment(), 'results': results}, file, indent=1)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        print()
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
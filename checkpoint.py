@@ -0,0 +1,121 @@
+import os
+import copy
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
+
+
+def snapshot(state):
+    # Deep copy of a (nested) state dict with every tensor detached and moved
+    # to the CPU, so training can go on mutating the originals
+    if isinstance(state, torch.Tensor):
+        return state.detach().to('cpu', copy=True)
+    if isinstance(state, np.ndarray):
+        return state.copy()
+    if isinstance(state, dict):
+        return {k: snapshot(v) for k, v in state.items()}
+    if isinstance(state, (list, tuple)):
+        return type(state)(snapshot(v) for v in state)
+    return copy.deepcopy(state)
+
+
+class CheckpointManager:
+    # Keeps the last `keep_last` checkpoints plus the `keep_best` highest
+    # scoring ones in `directory`, described by index.json. save() only takes
+    # an in-memory snapshot; serialising and writing happen on a background
+    # thread, through a temp file that is atomically renamed into place.
+    def __init__(self, directory, keep_last=3, keep_best=3, prefix='checkpoint'):
+        self.directory = directory
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.prefix = prefix
+        self.index_path = os.path.join(directory, 'index.json')
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.entries = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as file:
+                self.entries = json.load(file)
+        self.writer = ThreadPoolExecutor(max_workers=1)
+        self.pending = []
+
+    def save(self, state, step, score=None):
+        entry = {
+            'file': f'{self.prefix}_{step:010d}.pt',
+            'step': step,
+            'score': None if score is None else float(score),
+            'time': time.time(),
+        }
+        # a failed background write surfaces here, on the next save
+        done = [f for f in self.pending if f.done()]
+        self.pending = [f for f in self.pending if not f.done()]
+        self.pending.append(self.writer.submit(self._write, snapshot(state), entry))
+        for future in done:
+            future.result()
+
+    def _write(self, state, entry):
+        path = os.path.join(self.directory, entry['file'])
+        self._atomic(path, lambda tmp: torch.save({'meta': entry, 'state': state}, tmp))
+        with self.lock:
+            self.entries = [e for e in self.entries if e['file'] != entry['file']] + [entry]
+            self._prune()
+            entries = list(self.entries)
+        self._atomic(self.index_path, lambda tmp: self._dump(entries, tmp))
+
+    @staticmethod
+    def _dump(entries, path):
+        with open(path, 'w') as file:
+            json.dump(entries, file, indent=1)
+
+    @staticmethod
+    def _atomic(path, write):
+        tmp = path + '.tmp'
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _prune(self):
+        by_step = sorted(self.entries, key=lambda e: e['step'])
+        keep = {e['file'] for e in by_step[-self.keep_last:]} if self.keep_last else set()
+        scored = [e for e in self.entries if e['score'] is not None]
+        keep |= {e['file'] for e in sorted(scored, key=lambda e: e['score'])[max(len(scored) - self.keep_best, 0):]}
+        for entry in self.entries:
+            if entry['file'] not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, entry['file']))
+                except FileNotFoundError:
+                    pass
+        self.entries = [e for e in by_step if e['file'] in keep]
+
+    def latest(self):
+        with self.lock:
+            return max(self.entries, key=lambda e: e['step'], default=None)
+
+    def best(self):
+        with self.lock:
+            scored = [e for e in self.entries if e['score'] is not None]
+        return max(scored, key=lambda e: e['score'], default=None)
+
+    def load(self, entry=None):
+        # the given entry, or the latest checkpoint; None if there is none
+        entry = entry or self.latest()
+        if entry is None:
+            return None
+        path = os.path.join(self.directory, entry['file'])
+        return torch.load(path, map_location='cpu', weights_only=False)
+
+    def wait(self):
+        for future in self.pending:
+            future.result()
+        self.pending = []
+
+    def close(self):
+        self.wait()
+        self.writer.shutdown(wait=True)
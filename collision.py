@@ -0,0 +1,96 @@
+import time
+import random
+import pygame
+
+# Drop-in for pygame.sprite.groupcollide(groupa, groupb, dokilla, dokillb)
+# with a uniform-grid broadphase: groupb is hashed into cell_size cells and
+# every sprite of groupa is only tested against the sprites in the cells its
+# rect overlaps. Results match pygame exactly: same dict order, hits listed
+# in groupb order, and with dokillb a sprite of groupb is hit at most once,
+# by the first sprite of groupa that touches it.
+
+CELL_SIZE = 64
+# below this many pairs the plain O(n*m) pygame loop is faster
+BRUTE_FORCE_PAIRS = 256
+
+
+def groupcollide(groupa, groupb, dokilla, dokillb, cell_size=CELL_SIZE):
+    if len(groupa) * len(groupb) <= BRUTE_FORCE_PAIRS:
+        return pygame.sprite.groupcollide(groupa, groupb, dokilla, dokillb)
+
+    cells = {}
+    for index, sprite in enumerate(groupb.spritedict):
+        rect = sprite.rect
+        if not rect.width or not rect.height:
+            continue
+        for cx in range(rect.left // cell_size, (rect.right - 1) // cell_size + 1):
+            for cy in range(rect.top // cell_size, (rect.bottom - 1) // cell_size + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [(index, sprite)]
+                else:
+                    bucket.append((index, sprite))
+
+    crashed = {}
+    dead = set()
+    for sprite in groupa.spritedict:
+        rect = sprite.rect
+        if not rect.width or not rect.height:
+            continue
+        found = None
+        for cx in range(rect.left // cell_size, (rect.right - 1) // cell_size + 1):
+            for cy in range(rect.top // cell_size, (rect.bottom - 1) // cell_size + 1):
+                for index, other in cells.get((cx, cy), ()):
+                    if other not in dead and rect.colliderect(other.rect):
+                        if found is None:
+                            found = {}
+                        found[index] = other
+        if found:
+            hit = [found[i] for i in sorted(found)] if len(found) > 1 else list(found.values())
+            crashed[sprite] = hit
+            if dokillb:
+                dead.update(hit)
+
+    # kill only once both groups have been walked
+    if dokilla:
+        for sprite in crashed:
+            sprite.kill()
+    for other in dead:
+        other.kill()
+    return crashed
+
+
+def _random_groups(rng, n_bullets, n_aliens, width, height):
+    bullets = pygame.sprite.Group()
+    aliens = pygame.sprite.Group()
+    for group, n, size in ((bullets, n_bullets, (3, 15)), (aliens, n_aliens, (40, 40))):
+        for _ in range(n):
+            sprite = pygame.sprite.Sprite()
+            sprite.rect = pygame.Rect(rng.randrange(width), rng.randrange(height), *size)
+            group.add(sprite)
+    return bullets, aliens
+
+
+def benchmark(sizes=(10, 50, 200, 1000, 3000), repeat=5, seed=0):
+    # bullets and aliens scattered over a field that grows with the count, so
+    # density (and the number of real hits) stays roughly constant
+    for n in sizes:
+        side = int(800 * max(1, (n / 50) ** 0.5))
+        timings = {}
+        results = {}
+        for name, collide in (('pygame', pygame.sprite.groupcollide), ('grid', groupcollide)):
+            timings[name] = float('inf')
+            for _ in range(repeat):
+                # same seed for both, so both see identical groups
+                bullets, aliens = _random_groups(random.Random(seed + n), n, n, side, side)
+                start = time.perf_counter()
+                hits = collide(bullets, aliens, True, True)
+                timings[name] = min(timings[name], time.perf_counter() - start)
+            results[name] = [(tuple(b.rect), [tuple(a.rect) for a in h]) for b, h in hits.items()]
+        print(f'{n:5d} bullets x {n:5d} aliens | pygame {timings["pygame"] * 1e3:8.2f} ms | '
+              f'grid {timings["grid"] * 1e3:7.2f} ms | hits {len(results["grid"])} | '
+              f'{"match" if results["pygame"] == results["grid"] else "MISMATCH"}')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,112 @@
+import numpy as np
+
+# Geometry of test.GalacticShooterAI (and vecEnv); repeated here so the agent
+# does not pull in gymnasium/SB3 through vecEnv
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+PLAYER_WIDTH = 50
+PLAYER_HEIGHT = 50
+PLAYER_Y = SCREEN_HEIGHT - 10 - PLAYER_HEIGHT
+PLAYER_SPEED = 3
+ALIEN_WIDTH = 40
+ALIEN_HEIGHT = 40
+BULLET_WIDTH = 3
+BULLET_HEIGHT = 15
+ALIEN_MAX_SPEED = 2
+MAX_LIVES = 3
+
+# Fixed-size float32 state for the DQN agent, every entry roughly in [-1, 1]:
+#   player x, player speed, lives
+#   k nearest aliens:  dx, dy, fall speed, present
+#   k nearest bullets: dx, dy, present
+# dx/dy are measured from the player's centre and scaled by the screen size;
+# missing aliens/bullets are all zeros.
+
+
+class FeatureEncoder:
+    def __init__(self, k_aliens=3, k_bullets=2):
+        self.k_aliens = k_aliens
+        self.k_bullets = k_bullets
+        self.size = 3 + 4 * k_aliens + 3 * k_bullets
+        # scratch rows for the sprites of one group, grown on demand
+        self._rel = np.zeros((64, 3), dtype=np.float32)
+        self._dist = np.zeros(64, dtype=np.float32)
+
+    def encode(self, game, out=None):
+        # game is a test.GalacticShooterAI; out, if given, is overwritten
+        if out is None:
+            out = np.zeros(self.size, dtype=np.float32)
+        else:
+            out.fill(0)
+        player = game.player
+        rect = player.rect
+        out[0] = rect.x / (SCREEN_WIDTH - rect.width)
+        out[1] = player.speed_x / PLAYER_SPEED
+        out[2] = game.lives / MAX_LIVES
+        alien_end = 3 + 4 * self.k_aliens
+        self._nearest(game.aliens, rect.centerx, rect.centery, out[3:alien_end], self.k_aliens, True)
+        self._nearest(game.bullets, rect.centerx, rect.centery, out[alien_end:], self.k_bullets, False)
+        return out
+
+    def encode_batch(self, games, out):
+        for i, game in enumerate(games):
+            self.encode(game, out[i])
+        return out
+
+    def _nearest(self, group, px, py, out, k, with_speed):
+        # Group.spritedict is iterated directly so no sprite list is built
+        n = len(group)
+        if n == 0 or k == 0:
+            return
+        if n > len(self._rel):
+            self._rel = np.zeros((2 * n, 3), dtype=np.float32)
+            self._dist = np.zeros(2 * n, dtype=np.float32)
+        rel = self._rel[:n]
+        for i, sprite in enumerate(group.spritedict):
+            rect = sprite.rect
+            rel[i, 0] = (rect.centerx - px) / SCREEN_WIDTH
+            rel[i, 1] = (rect.centery - py) / SCREEN_HEIGHT
+            if with_speed:
+                rel[i, 2] = sprite.speed_y / ALIEN_MAX_SPEED
+        dist = self._dist[:n]
+        np.hypot(rel[:, 0], rel[:, 1], out=dist)
+        order = np.argsort(dist)[:k]
+        width = 4 if with_speed else 3
+        block = out.reshape(k, width)
+        block[:len(order), :width - 1] = rel[order, :width - 1]
+        block[:len(order), width - 1] = 1
+
+    def encode_engine(self, engine, out):
+        # Same features for every game of a vecEnv.VecGalacticShooter at once;
+        # integer centres, like pygame.Rect.center
+        out.fill(0)
+        px = engine.player_x + PLAYER_WIDTH // 2
+        py = PLAYER_Y + PLAYER_HEIGHT // 2
+        out[:, 0] = engine.player_x / (SCREEN_WIDTH - PLAYER_WIDTH)
+        out[:, 1] = engine.player_speed / PLAYER_SPEED
+        out[:, 2] = engine.lives / MAX_LIVES
+        alien_end = 3 + 4 * self.k_aliens
+
+        aliens = out[:, 3:alien_end].reshape(-1, self.k_aliens, 4)
+        dx = (engine.alien_x + ALIEN_WIDTH // 2 - px[:, None]) / SCREEN_WIDTH
+        dy = (engine.alien_y + ALIEN_HEIGHT // 2 - py) / SCREEN_HEIGHT
+        speed = engine.alien_speed / ALIEN_MAX_SPEED
+        self._nearest_rows(aliens, engine.alien_alive, (dx, dy, speed))
+
+        bullets = out[:, alien_end:].reshape(-1, self.k_bullets, 3)
+        dx = (engine.bullet_x + BULLET_WIDTH // 2 - px[:, None]) / SCREEN_WIDTH
+        dy = (engine.bullet_y + BULLET_HEIGHT // 2 - py) / SCREEN_HEIGHT
+        self._nearest_rows(bullets, engine.bullet_alive, (dx, dy))
+        return out
+
+    @staticmethod
+    def _nearest_rows(block, alive, columns):
+        k = block.shape[1]
+        if k == 0:
+            return
+        dist = np.where(alive, np.hypot(columns[0], columns[1]), np.inf)
+        order = np.argsort(dist, axis=1)[:, :k]
+        present = np.take_along_axis(alive, order, axis=1)
+        for j, column in enumerate(columns):
+            block[:, :, j] = np.take_along_axis(column, order, axis=1) * present
+        block[:, :, len(columns)] = present
@@ -1,19 +1,58 @@
+import sys
 import matplotlib.pyplot as plt
-from IPython import display
-
-plt.ion()
-
-def plot(scores, mean_scores):
-    display.clear_output(wait=True)
-    display.display(plt.gcf())
-    plt.clf()
-    plt.title('Training...')
-    plt.xlabel('Number of Games')
-    plt.ylabel('Score')
-    plt.plot(scores)
-    plt.plot(mean_scores)
-    plt.ylim(ymin=0)
-    plt.text(len(scores)-1, scores[-1], str(scores[-1]))
-    plt.text(len(mean_scores)-1, mean_scores[-1], str(mean_scores[-1]))
-    plt.show(block=False)
-    plt.pause(.1)
+from metrics import MetricsReader, downsample
+
+# Plots a metrics file written by metrics.MetricsSink, either once to an
+# image or live from its own process:
+#   python helper.py model/metrics.jsonl             # live window
+#   python helper.py model/metrics.jsonl plot.png    # render once
+
+MAX_POINTS = 2000
+
+
+def plot(reader, fig, max_points=MAX_POINTS):
+    fig.clf()
+    score_ax, speed_ax, loss_ax = fig.subplots(3, 1, sharex=True)
+
+    score_ax.set_title('Training...')
+    score_ax.set_ylabel('Score')
+    scores = reader.column('score')
+    for key in ('score', 'mean_score'):
+        x, y = downsample(reader.column(key), max_points)
+        score_ax.plot(x, y, label=key)
+    score_ax.set_ylim(ymin=0)
+    score_ax.legend(loc='upper left')
+    if len(scores):
+        score_ax.text(len(scores) - 1, scores[-1], f'{scores[-1]:g}')
+
+    speed_ax.set_ylabel('Steps/sec')
+    speed_ax.plot(*downsample(reader.column('steps_per_sec'), max_points))
+
+    loss_ax.set_ylabel('Loss')
+    loss_ax.set_xlabel('Number of Games')
+    loss_ax.plot(*downsample(reader.column('loss'), max_points))
+
+
+def render(path, out, max_points=MAX_POINTS):
+    reader = MetricsReader(path)
+    reader.poll()
+    fig = plt.figure(figsize=(8, 8))
+    plot(reader, fig, max_points)
+    fig.savefig(out)
+
+
+def watch(path, interval=2.0, max_points=MAX_POINTS):
+    reader = MetricsReader(path)
+    plt.ion()
+    fig = plt.figure(figsize=(8, 8))
+    while plt.fignum_exists(fig.number):
+        if reader.poll():
+            plot(reader, fig, max_points)
+        plt.pause(interval)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        render(sys.argv[1], sys.argv[2])
+    else:
+        watch(sys.argv[1])
@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import queue
+import sqlite3
+import threading
+
+# Best scores, kept in SQLite in WAL mode so any number of game processes can
+# add to the same file at once (writers queue on a busy timeout, readers are
+# never blocked). submit() only puts the score on a queue; a background
+# thread inserts it, so the frame loop never waits on the disk. Every
+# compact_every inserts the table is cut back to the best `keep` rows and the
+# WAL is checkpointed, so neither file grows without bound.
+#
+# The first open of a new database imports the single score of the old
+# highscore.txt, if there is one.
+#
+#   python leaderboard.py                 print the top 10
+#   python leaderboard.py leaderboard.db 20
+
+# next to the game, like assets.IMAGE_DIR, whatever the working directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(BASE_DIR, "leaderboard.db")
+LEGACY_PATH = os.path.join(BASE_DIR, "highscore.txt")
+# PRAGMA user_version of an initialised database
+SCHEMA_VERSION = 1
+
+
+def connect(path, timeout=30.0):
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL stays consistent with NORMAL; a crash may only lose the last commits
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _init(conn, legacy_path):
+    # BEGIN IMMEDIATE takes the write lock, so of several processes opening
+    # a new file at once exactly one creates it and imports the legacy score
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            conn.execute("CREATE TABLE IF NOT EXISTS scores ("
+                         "id INTEGER PRIMARY KEY, name TEXT NOT NULL, score INTEGER NOT NULL, time REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS scores_rank ON scores (score DESC, time)")
+            legacy = _read_legacy(legacy_path)
+            if legacy:
+                conn.execute("INSERT INTO scores (name, score, time) VALUES (?, ?, ?)",
+                             ("legacy", legacy, os.path.getmtime(legacy_path)))
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _read_legacy(path):
+    try:
+        with open(path, "r") as file:
+            return int(file.readline())
+    except (FileNotFoundError, ValueError, TypeError):
+        return 0
+
+
+class Leaderboard:
+    def __init__(self, path=DEFAULT_PATH, keep=100, compact_every=50, legacy_path=LEGACY_PATH):
+        self.path = path
+        self.keep = keep
+        self.compact_every = compact_every
+        self.inserted = 0
+        conn = connect(path)
+        _init(conn, legacy_path)
+        row = conn.execute("SELECT MAX(score) FROM scores").fetchone()
+        conn.close()
+        # best score seen, including ones still on the queue, for the HUD
+        self._best = row[0] or 0
+        self.queue = queue.Queue()
+        self.conn = None
+        self.writer = threading.Thread(target=self._run, name="leaderboard", daemon=True)
+        try:
+            self.writer.start()
+        except RuntimeError:
+            # no threads (the browser build): write in submit() instead
+            self.writer = None
+
+    def best(self):
+        return self._best
+
+    def submit(self, score, name="player"):
+        self._best = max(self._best, score)
+        entry = (name, int(score), time.time())
+        if self.writer is None:
+            self._write([entry])
+        else:
+            self.queue.put(entry)
+
+    def top(self, n=10):
+        # (name, score, time) of the n best scores, best first; reads the
+        # file, so not for the frame loop
+        conn = connect(self.path)
+        try:
+            return conn.execute("SELECT name, score, time FROM scores ORDER BY score DESC, time LIMIT ?",
+                                (n,)).fetchall()
+        finally:
+            conn.close()
+
+    def flush(self):
+        # wait until every submitted score is on disk
+        if self.writer is not None:
+            self.queue.join()
+
+    def close(self):
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+        self._disconnect()
+
+    def _run(self):
+        while True:
+            entries = [self.queue.get()]
+            # whatever else is already waiting goes into the same transaction
+            while True:
+                try:
+                    entries.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in entries
+            try:
+                self._write([e for e in entries if e is not None])
+            except sqlite3.Error as error:
+                print(f"leaderboard: could not save scores: {error}", file=sys.stderr)
+            finally:
+                for _ in entries:
+                    self.queue.task_done()
+            if stop:
+                self._disconnect()
+                return
+
+    def _disconnect(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def _write(self, entries):
+        if not entries:
+            return
+        if self.conn is None:
+            # opened by the thread that writes, sqlite3 connections are per thread
+            self.conn = connect(self.path)
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO scores (name, score, time) VALUES (?, ?, ?)", entries)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.inserted += len(entries)
+        if self.inserted >= self.compact_every:
+            self.inserted = 0
+            self._compact()
+
+    def _compact(self):
+        # drop everything below the best `keep` rows and fold the WAL back
+        # into the database file
+        conn = self.conn
+        conn.execute("DELETE FROM scores WHERE id NOT IN "
+                     "(SELECT id FROM scores ORDER BY score DESC, time LIMIT ?)", (self.keep,))
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    board = Leaderboard(path)
+    for rank, (name, score, when) in enumerate(board.top(n), 1):
+        print(f"{rank:3d}  {score:6d}  {name:<16} {time.strftime('%Y-%m-%d %H:%M', time.localtime(when))}")
+    board.close()
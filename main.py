@@ -1,9 +1,11 @@
 import pygame
 import random
-import os
 import asyncio
-
-pygame.init()
+import time
+import assets
+from collision import groupcollide
+from screenRenderer import DirtyRenderer, HudText, HudIcons
+from leaderboard import Leaderboard
 
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
@@ -11,29 +13,23 @@ SCREEN_HEIGHT = 600
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Infinite Galactic Shooter")
-
-# Load images
-player_image = pygame.image.load(os.path.join("images", "rocket-ship.png")).convert_alpha()
-player_image = pygame.transform.scale(player_image, (50, 50))
-
-alien_image = pygame.image.load(os.path.join("images", "space-invaders.png")).convert_alpha()
-alien_image = pygame.transform.scale(alien_image, (30, 30))
-
-life_image = pygame.image.load(os.path.join("images", "heart.png")).convert_alpha()
-life_image = pygame.transform.scale(life_image, (25, 25))
-
-
-# ! background music & Blaster Sound
-pygame.mixer.init()
+# Simulation steps per second; every speed is in pixels per step, so the game
+# runs at the same pace whatever the frame rate
+SIM_RATE = 60
+# at most this many steps per rendered frame; beyond that the game slows down
+# instead of freezing to catch up
+MAX_STEPS_PER_FRAME = 5
+# frames per second to draw at most
+RENDER_FPS = 60
+# show render FPS and simulation steps/s in the bottom right corner
+SHOW_STATS = False
 
 
 # Player class
 class Player(pygame.sprite.Sprite):
     def __init__(self):
         super().__init__()
-        self.image = player_image
+        self.image = assets.image("rocket-ship.png", (50, 50))
         self.rect = self.image.get_rect()
         self.rect.centerx = SCREEN_WIDTH // 2
         self.rect.bottom = SCREEN_HEIGHT - 10
@@ -49,7 +45,7 @@ class Player(pygame.sprite.Sprite):
         self.rect.x += self.speed_x
         self.rect.x = max(0, min(SCREEN_WIDTH - self.rect.width, self.rect.x))
 
-    def shoot(self):
+    def shoot(self, bullets, all_sprites):
         bullet = Bullet(self.rect.centerx, self.rect.top)
         all_sprites.add(bullet)
         bullets.add(bullet)
@@ -58,8 +54,7 @@ class Player(pygame.sprite.Sprite):
 class Bullet(pygame.sprite.Sprite):
     def __init__(self, x, y):
         super().__init__()
-        self.image = pygame.Surface((3, 15))
-        self.image.fill((0, 255, 0))
+        self.image = assets.solid((3, 15), (0, 255, 0))
         self.rect = self.image.get_rect()
         self.rect.centerx = x
         self.rect.bottom = y
@@ -71,163 +66,233 @@ class Bullet(pygame.sprite.Sprite):
             self.kill()
 
 class Alien(pygame.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, rng=random):
         super().__init__()
-        self.image = alien_image
+        self.image = assets.image("space-invaders.png", (30, 30))
         self.rect = self.image.get_rect()
-        self.rect.x = random.randrange(SCREEN_WIDTH - self.rect.width)
-        self.rect.y = random.randrange(-100, -40)
-        self.speed_y = random.randrange(1, 4)
+        self.rng = rng
+        self.spawn()
+
+    def spawn(self):
+        self.rect.x = self.rng.randrange(SCREEN_WIDTH - self.rect.width)
+        self.rect.y = self.rng.randrange(-100, -40)
+        self.speed_y = self.rng.randrange(1, 4)
 
     def update(self):
         self.rect.y += self.speed_y
         if self.rect.top > SCREEN_HEIGHT:
-            self.rect.x = random.randrange(SCREEN_WIDTH - self.rect.width)
-            self.rect.y = random.randrange(-100, -40)
-            self.speed_y = random.randrange(1, 4)
-
-# Sprite groups
-all_sprites = pygame.sprite.Group()
-aliens = pygame.sprite.Group()
-bullets = pygame.sprite.Group()
+            self.spawn()
+
+class FrameScheduler:
+    # Paces the main loop without ever blocking the asyncio event loop (the
+    # browser build needs it to keep running): while playing, frames are
+    # spaced 1/fps apart; on a static screen the loop only wakes every
+    # idle_interval to look for new events, so it uses next to no CPU.
+    def __init__(self, fps=60, idle_interval=0.05):
+        self.frame_time = 1 / fps
+        self.idle_interval = idle_interval
+        self.next_frame = time.perf_counter()
+
+    async def frame(self):
+        self.next_frame += self.frame_time
+        delay = self.next_frame - time.perf_counter()
+        if delay < 0:
+            # running behind: start counting again from now, don't catch up
+            self.next_frame = time.perf_counter()
+            delay = 0
+        await asyncio.sleep(delay)
+
+    async def idle(self):
+        while not pygame.event.peek():
+            await asyncio.sleep(self.idle_interval)
+        self.next_frame = time.perf_counter()
+
+
+class RateCounter:
+    # events per second, measured over windows of `window` seconds
+    def __init__(self, window=1.0):
+        self.window = window
+        self.count = 0
+        self.start = time.perf_counter()
+        self.rate = 0.0
+
+    def tick(self, n=1):
+        self.count += n
+        now = time.perf_counter()
+        if now - self.start >= self.window:
+            self.rate = self.count / (now - self.start)
+            self.count = 0
+            self.start = now
+
+
+def draw_game_over(screen, font, score, highscore):
+    # returns the exit button's rect
+    screen.fill(BLACK)
+    game_over_text = font.render("Game Over.", True, WHITE)
+    screen.blit(game_over_text, (SCREEN_WIDTH // 2 - 60, SCREEN_HEIGHT // 2 - 100))
+    score_text = font.render(f"Your Score: {score}", True, WHITE)
+    screen.blit(score_text, (SCREEN_WIDTH // 2 - 60, SCREEN_HEIGHT // 2 - 50))
+    highscore_text = font.render(f"Highscore: {highscore}", True, WHITE)
+    screen.blit(highscore_text, (SCREEN_WIDTH // 2 - 60, SCREEN_HEIGHT // 2 ))
+
+    exit_button = pygame.draw.rect(screen, WHITE, (SCREEN_WIDTH/2 - 50, 400, 100, 50))
+
+    exit_text = font.render("Exit", True, BLACK)
+    screen.blit(exit_text, (SCREEN_WIDTH/2 - 25, 415))
+
+    highscore_text = font.render(f"Refresh the Page", True, WHITE)
+    screen.blit(highscore_text, (SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT - 100 ))
+
+    pygame.display.flip()
+    return exit_button
 
-player = Player()
-all_sprites.add(player)
-
-score = 0
-lives = 3
+    # ! Main game loop
+async def main():
+    pygame.init()
+    # ! background music & Blaster Sound
+    pygame.mixer.init()
+    screen = assets.window()
+    font = assets.font(30)
+    font2 = assets.font(24)
+    life_image = assets.image("heart.png", (25, 25))
 
+    # Sprite groups; all_sprites remembers where it drew, for dirty rects
+    all_sprites = pygame.sprite.RenderUpdates()
+    aliens = pygame.sprite.Group()
+    bullets = pygame.sprite.Group()
 
-font = pygame.font.Font(None, 30)
-font2 = pygame.font.Font(None, 24)
+    player = Player()
+    all_sprites.add(player)
 
-def load_highscore():
-    try:
-        with open("highscore.txt", "r") as file:
-            return int(file.readline())
-    except FileNotFoundError:
-        return 0
+    score = 0
+    lives = 3
 
-def save_highscore(score):
-    with open("highscore.txt", "w") as file:
-        file.write(str(score))
+    # Spawns and extra lives draw from this stream; seed it to replay a game
+    rng = random.Random()
 
-    # ! Main game loop
-async def main():
-    global lives, score
     running = True
-    clock = pygame.time.Clock()
+    scheduler = FrameScheduler(fps=RENDER_FPS)
+    step_time = 1 / SIM_RATE
+    # simulated time owed to the game, consumed in step_time slices
+    accumulator = 0.0
+    last_time = time.perf_counter()
+    sim_rate = RateCounter()
+    render_rate = RateCounter()
 
     game_over = False
+    # the game-over page is static: drawn once, then only when exposed again
+    exit_button = None
+
+    # scores are saved by a background writer; best() is kept in memory
+    leaderboard = Leaderboard()
+    highscore = leaderboard.best()
+
+    # HUD text is rendered once and again only when its value changes
+    score_hud = HudText(font, "Score: {}", (10, 50), score)
+    lives_hud = HudIcons(life_image, (85, 85), 40, lives)
+    renderer = DirtyRenderer(screen, [
+        HudText(font, "HI-Score: {}", (10, 10), highscore),
+        score_hud,
+        HudText(font, "Lives: ", (10, 90)),
+        HudText(font2, "Movement: Arrow Keys", (610, 10)),
+        HudText(font2, "Shoot: SpaceBar", (610, 30)),
+        lives_hud,
+    ])
+    stats_hud = HudText(font2, "{}", (SCREEN_WIDTH - 190, SCREEN_HEIGHT - 25), "")
+    if SHOW_STATS:
+        renderer.hud.append(stats_hud)
+
+    def step():
+        # one fixed-length simulation step
+        nonlocal score, lives
+        all_sprites.update()
+
+        # Check for collisions between bullets and aliens
+        hits = groupcollide(bullets, aliens, True, True)
+
+        # Check if a alien is destroyed and increase score
+        if len(hits) > 0:
+            score += 1
+
+        # Check if player gets an extra life from destroying aliens
+        if len(hits) > 0 and rng.random() < 0.05:  # 5% chance
+            lives += 1
+
+        # Check if aliens reach the bottom
+        for alien in aliens:
+            if alien.rect.top > SCREEN_HEIGHT - 10:
+                lives -= 1
+                alien.kill()
+
+        # Check for collisions between player and aliens
+        hits_player = pygame.sprite.spritecollide(player, aliens, True)
+        if hits_player:
+            lives -= 1
 
-    highscore = load_highscore()
+        # Spawn new aliens
+        if len(aliens) < 5 and rng.random() < 0.02:
+            new_alien = Alien(rng)
+            all_sprites.add(new_alien)
+            aliens.add(new_alien)
 
     while running:
+        # the only event pump: every event is seen exactly once
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                exit_button = None
+                renderer.invalidate()
+            elif game_over:
+                if event.type == pygame.MOUSEBUTTONDOWN and exit_button and exit_button.collidepoint(event.pos):
+                    running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    player.shoot()
+                    player.shoot(bullets, all_sprites)
 
+        if not running:
+            break
         if game_over:
-            screen.fill(BLACK)
-            game_over_text = font.render("Game Over.", True, WHITE)
-            screen.blit(game_over_text, (SCREEN_WIDTH // 2 - 60, SCREEN_HEIGHT // 2 - 100))
-            score_text = font.render(f"Your Score: {score}", True, WHITE)
-            screen.blit(score_text, (SCREEN_WIDTH // 2 - 60, SCREEN_HEIGHT // 2 - 50))
-            highscore_text = font.render(f"Highscore: {highscore}", True, WHITE)
-            screen.blit(highscore_text, (SCREEN_WIDTH // 2 - 60, SCREEN_HEIGHT // 2 ))
-            
-
-            exit_button = pygame.draw.rect(screen, WHITE, (SCREEN_WIDTH/2 - 50, 400, 100, 50))
-
-            exit_text = font.render("Exit", True, BLACK)
-            screen.blit(exit_text, (SCREEN_WIDTH/2 - 25, 415))
-            
-            highscore_text = font.render(f"Refresh the Page", True, WHITE)
-            screen.blit(highscore_text, (SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT - 100 ))
-
-            pygame.display.flip()
-
-            for event in pygame.event.get():
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_pos = pygame.mouse.get_pos()
-                    if exit_button.collidepoint(mouse_pos):
-                        running = False
+            if exit_button is None:
+                exit_button = draw_game_over(screen, font, score, highscore)
+            await scheduler.idle()
         else:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE:
-                        player.shoot()
-
-            # ! Update
-            all_sprites.update()
-
-            # Check for collisions between bullets and aliens
-            hits = pygame.sprite.groupcollide(bullets, aliens, True, True)
-
-            # Check if a alien is destroyed and increase score
-            if len(hits) > 0:
-                score += 1
-        
-            # Check if player gets an extra life from destroying aliens
-            if len(hits) > 0 and random.random() < 0.05:  # 5% chance
-                lives += 1
-
-            # Check if aliens reach the bottom
-            for alien in aliens:
-                if alien.rect.top > SCREEN_HEIGHT - 10:
-                    lives -= 1
-                    alien.kill()
-
-            # Check for collisions between player and aliens
-            hits_player = pygame.sprite.spritecollide(player, aliens, True)
-            if hits_player:
-                lives -= 1
-
-            # Spawn new aliens
-            if len(aliens) < 5 and random.random() < 0.02:
-                new_alien = Alien()
-                all_sprites.add(new_alien)
-                aliens.add(new_alien)
-
-            # Draw
-            screen.fill(BLACK)
-            all_sprites.draw(screen)
-
-            # Draw score and lives
-            score_text = font.render(f"HI-Score: {highscore}", True, WHITE)
-            screen.blit(score_text, (10, 10))
-            score_text = font.render(f"Score: {score}", True, WHITE)
-            screen.blit(score_text, (10, 50))
-            life_text = font.render(f"Lives: ", True, WHITE)
-            screen.blit(life_text, (10, 90))
-            
-            move_controls = font2.render(f"Movement: Arrow Keys", True, WHITE)
-            screen.blit(move_controls, (610, 10))
-            shoot_control = font2.render(f"Shoot: SpaceBar", True, WHITE)
-            screen.blit(shoot_control, (610, 30))
-
-            # Draw life icons
-            for i in range(lives):
-                screen.blit(life_image, (85 + i * 40, 85))
-
-            pygame.display.flip()
-            clock.tick(60)
+            # ! Update: as many fixed steps as the time since the last frame holds
+            now = time.perf_counter()
+            accumulator += now - last_time
+            last_time = now
+            steps = 0
+            while accumulator >= step_time and steps < MAX_STEPS_PER_FRAME and lives > 0:
+                step()
+                accumulator -= step_time
+                steps += 1
+            if steps == MAX_STEPS_PER_FRAME:
+                # too far behind: drop the backlog rather than spiral
+                accumulator = min(accumulator, step_time)
+            sim_rate.tick(steps)
+
+            # Draw only what moved or changed; frames without a step would
+            # show the same picture, so they are skipped
+            if steps or renderer.full:
+                score_hud.set(score)
+                lives_hud.set(lives)
+                stats_hud.set(f"{render_rate.rate:3.0f} FPS {sim_rate.rate:3.0f} steps/s")
+                pygame.display.update(renderer.draw(all_sprites))
+                render_rate.tick()
 
             # Game over condition
             if lives <= 0:
                 game_over = True
-                if score > highscore:
-                    highscore = score
-                    save_highscore(highscore)
-        await asyncio.sleep(0)
+                leaderboard.submit(score)
+                highscore = leaderboard.best()
+            await scheduler.frame()
+
+    # waits for the writer to save the last score
+    leaderboard.close()
     
-# Run the main function
-asyncio.run(main())
+if __name__ == '__main__':
+    # Run the main function
+    asyncio.run(main())
 
-# Quit Pygame
-pygame.quit()
\ No newline at end of file
+    # Quit Pygame
+    pygame.quit()
\ No newline at end of file
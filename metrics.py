@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import time
+import warnings
+import subprocess
+from collections import deque
+import numpy as np
+
+# Training loops record one row per episode here and never draw anything;
+# helper.py plots the file from another process or after the run.
+
+
+class MetricsSink:
+    def __init__(self, path, capacity=1000, live=False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # line-buffered, so a reader tailing the file sees whole rows
+        self.file = open(path, 'a', buffering=1)
+        self.recent = deque(maxlen=capacity)
+        self.viewer = None
+        if live:
+            helper = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'helper.py')
+            self.viewer = subprocess.Popen([sys.executable, helper, path])
+
+    def record(self, **values):
+        values.setdefault('time', time.time())
+        self.recent.append(values)
+        self.file.write(json.dumps(values) + '\n')
+
+    def close(self):
+        self.file.close()
+        if self.viewer is not None:
+            # the live plot ends with training
+            self.viewer.terminate()
+            try:
+                self.viewer.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.viewer.kill()
+                self.viewer.wait()
+            self.viewer = None
+
+
+class MetricsReader:
+    # Tails a metrics file: every poll() only parses the rows appended since
+    # the last one
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.columns = {}
+        self.rows = 0
+
+    def poll(self):
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path) as file:
+            file.seek(self.offset)
+            new = 0
+            while True:
+                line = file.readline()
+                if not line.endswith('\n'):
+                    break
+                self.offset += len(line.encode())
+                row = json.loads(line)
+                for key, value in row.items():
+                    # keys first seen late are padded with NaN for earlier rows
+                    self.columns.setdefault(key, [np.nan] * self.rows).append(value)
+                self.rows += 1
+                for column in self.columns.values():
+                    if len(column) < self.rows:
+                        column.append(np.nan)
+                new += 1
+        return new
+
+    def column(self, key):
+        return np.asarray(self.columns.get(key, []), dtype=np.float64)
+
+
+def downsample(values, max_points):
+    # mean of equal-sized buckets once a series outgrows max_points
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= max_points:
+        return np.arange(len(values)), values
+    size = int(np.ceil(len(values) / max_points))
+    n = len(values) // size * size
+    buckets = values[:n].reshape(-1, size)
+    x = np.arange(n).reshape(-1, size).mean(axis=1)
+    with warnings.catch_warnings():
+        # buckets with no value at all (e.g. no loss yet) stay NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        y = np.nanmean(buckets, axis=1)
+        if n < len(values):
+            x = np.append(x, np.arange(n, len(values)).mean())
+            y = np.append(y, np.nanmean(values[n:]))
+    return x, y
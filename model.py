@@ -1,39 +1,69 @@
 import os
+from collections import deque
+from functools import partial
+# Training never needs a window; run on SDL's dummy video driver unless told otherwise
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
 import numpy as np
 import gymnasium as gym
 from stable_baselines3 import PPO
 from stable_baselines3.common.callbacks import BaseCallback
 from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.results_plotter import load_results, ts2xy
+from stable_baselines3.common.vec_env import VecMonitor
 from stable_baselines3.common import results_plotter
 import matplotlib.pyplot as plt
-import cv2
-import pygame
 from test import GalacticShooterAI, Direction
-import random 
+from vecEnv import GalacticShooterVectorEnv, SB3VecEnv
+from parallelEnv import SharedMemoryVecEnv
+from obsRenderer import ObsRenderer, ObsPipeline, FrameStack
+from checkpoint import CheckpointManager
 
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
+ACTIONS = [Direction.LEFT, Direction.RIGHT, Direction.SHOOT, Direction.DO_NOTHING]
 
 class GalacticShooterEnv(gym.Env):
-    def __init__(self):
+    def __init__(self, headless=True, obs_mode="raster", frame_skip=1, frame_stack=1, max_aliens=1, profiler=None):
         super(GalacticShooterEnv, self).__init__()
         self.action_space = gym.spaces.Discrete(4)
-        self.observation_space = gym.spaces.Box(low=0, high=255, shape=(84, 84, 1), dtype=np.uint8)
-        self.game = GalacticShooterAI()
+        self.observation_space = gym.spaces.Box(low=0, high=255, shape=(84, 84, frame_stack), dtype=np.uint8)
+        self.game = GalacticShooterAI(headless=headless, max_aliens=max_aliens)
+        # shared with the game, so env phases follow the play_step ones
+        self.game.profiler = profiler
+        # every action is repeated for frame_skip game ticks and only the last
+        # tick is observed; with frame_stack > 1 the observation holds the
+        # last frame_stack observed frames as channels
+        self.frame_skip = frame_skip
+        self.frames = FrameStack(frame_stack) if frame_stack > 1 else None
+        # "raster" draws the sprites straight into the 84x84 observation,
+        # "screen" downscales the full 800x600 frame
+        self.obs_mode = obs_mode
+        self.renderer = ObsRenderer(mask_bullets=True)
+        self.pipeline = ObsPipeline(mask_bullets=True)
         
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
-        if seed is not None:
-            np.random.seed(seed)
-            random.seed(seed)
-        self.game.reset()
-        return self._get_obs(), {}
+        self.game.reset(seed=seed)
+        obs = self._get_obs()
+        # the renderers reuse their buffer and the stack returns a copy;
+        # callers may keep what they get
+        obs = self.frames.reset(obs) if self.frames is not None else obs.copy()
+        return obs, {}
 
     def step(self, action):
-        actions = [Direction.LEFT, Direction.RIGHT, Direction.SHOOT, Direction.DO_NOTHING]
-        reward, done, score = self.game.play_step(actions[action])
+        reward = 0
+        for _ in range(self.frame_skip):
+            tick_reward, done, score = self.game.play_step(ACTIONS[action])
+            reward += tick_reward
+            if done:
+                break
+        prof = self.game.profiler
         obs = self._get_obs()
+        if prof is not None:
+            prof.lap('obs')
+        if self.frames is not None:
+            obs = self.frames.push(obs)
+            if prof is not None:
+                prof.lap('frame_stack')
+        else:
+            obs = obs.copy()
         terminated = done
         truncated = False
         return obs, reward, terminated, truncated, {}
@@ -42,38 +72,39 @@ class GalacticShooterEnv(gym.Env):
         self.game.update_ui()
 
     def _get_obs(self):
-        raw_pixels = pygame.surfarray.array3d(pygame.display.get_surface())
-        raw_pixels = np.transpose(raw_pixels, (1, 0, 2))
-
-        gray_pixels = cv2.cvtColor(raw_pixels, cv2.COLOR_RGB2GRAY)
-
-        # Маскирование пуль (красный цвет в RGB)
-        lower_red = np.array([100, 0, 0])
-        upper_red = np.array([255, 100, 100])
-        mask = cv2.inRange(raw_pixels, lower_red, upper_red)
-        gray_pixels[mask > 0] = 0
-        gray_pixels = cv2.resize(gray_pixels, (84, 84), interpolation=cv2.INTER_AREA)
+        if self.obs_mode == "raster":
+            return self.renderer.render(self.game)
 
-        obs = np.expand_dims(gray_pixels, axis=-1)
-        return obs
+        if self.game.headless:
+            self.game.draw()
+        return self.pipeline(self.game.display)
 
 class SaveOnBestTrainingRewardCallback(BaseCallback):
-    def __init__(self, check_freq: int, log_dir: str, verbose=1):
+    def __init__(self, check_freq: int, log_dir: str, verbose=1, window: int = 50):
         super(SaveOnBestTrainingRewardCallback, self).__init__(verbose)
         self.check_freq = check_freq
         self.log_dir = log_dir
         self.save_path = os.path.join(log_dir, 'best_model')
         self.best_mean_reward = -np.inf
+        # rewards of the last `window` finished episodes, fed from the infos
+        # instead of re-reading monitor.csv on every check
+        self.episode_rewards = deque(maxlen=window)
+        self.checkpoints = CheckpointManager(self.save_path)
 
     def _init_callback(self) -> None:
         if self.save_path is not None:
             os.makedirs(self.save_path, exist_ok=True)
 
     def _on_step(self) -> bool:
+        # Monitor/VecMonitor add an "episode" entry to the info of each finished episode
+        for info in self.locals["infos"]:
+            episode = info.get("episode")
+            if episode is not None:
+                self.episode_rewards.append(episode["r"])
+
         if self.n_calls % self.check_freq == 0:
-            x, y = ts2xy(load_results(self.log_dir), 'timesteps')
-            if len(x) > 0:
-                mean_reward = np.mean(y[-50:])
+            if len(self.episode_rewards) > 0:
+                mean_reward = np.mean(self.episode_rewards)
                 if self.verbose > 0:
                     print(f"Num timesteps: {self.num_timesteps}")
                     print(f"Best mean reward: {self.best_mean_reward:.2f} - Last mean reward per episode: {mean_reward:.2f}")
@@ -82,28 +113,62 @@ class SaveOnBestTrainingRewardCallback(BaseCallback):
                     self.best_mean_reward = mean_reward
                     if self.verbose > 0:
                         print(f"Saving new best model to {self.save_path}")
-                    self.model.save(self.save_path)
+                    # policy and optimizer state, written in the background
+                    self.checkpoints.save(self.model.get_parameters(), step=self.num_timesteps, score=mean_reward)
         return True
 
-log_dir = "tmp/"
-os.makedirs(log_dir, exist_ok=True)
-
-# Create and wrap the environment
-env = GalacticShooterEnv()
-env = Monitor(env, log_dir)
-
-# Instantiate the agent with adjusted hyperparameters
-model = PPO('CnnPolicy', env, verbose=1, n_steps=2048, learning_rate=0.0003)
-
-# Callback to save the best model
-callback = SaveOnBestTrainingRewardCallback(check_freq=1000, log_dir=log_dir)
-
-# Train the agent with increased training steps
-model.learn(total_timesteps=2000000, callback=callback)
-
-# Plot the results
-results_plotter.plot_results([log_dir], 2000000, results_plotter.X_TIMESTEPS, "PPO GalacticShooter")
-plt.show()
-
-# Save the final model
-model.save("GalacticShooterModel")
\ No newline at end of file
+    def _on_training_end(self) -> None:
+        self.checkpoints.close()
+
+if __name__ == '__main__':
+    log_dir = "tmp/"
+    os.makedirs(log_dir, exist_ok=True)
+
+    # "numpy": all games stepped together in the NumPy engine
+    # "subproc": one pygame env per worker process
+    # "single": one pygame env in this process
+    ENV_BACKEND = "numpy"
+    N_ENVS = 64
+    N_WORKERS = os.cpu_count()
+    # continue from the best checkpoint in tmp/best_model
+    RESUME = False
+    # action repeat and stacked frames, the same for every backend so
+    # checkpoints stay compatible across them
+    FRAME_SKIP = 4
+    FRAME_STACK = 4
+
+    # Create and wrap the environment
+    if ENV_BACKEND == "numpy":
+        venv = GalacticShooterVectorEnv(N_ENVS, frame_skip=FRAME_SKIP, frame_stack=FRAME_STACK)
+        env = VecMonitor(SB3VecEnv(venv), log_dir)
+    elif ENV_BACKEND == "subproc":
+        N_ENVS = N_WORKERS
+        env_fn = partial(GalacticShooterEnv, frame_skip=FRAME_SKIP, frame_stack=FRAME_STACK)
+        env = VecMonitor(SharedMemoryVecEnv(env_fn, n_workers=N_WORKERS, seed=0), log_dir)
+    else:
+        N_ENVS = 1
+        env = GalacticShooterEnv(frame_skip=FRAME_SKIP, frame_stack=FRAME_STACK)
+        env = Monitor(env, log_dir)
+
+    # Instantiate the agent with adjusted hyperparameters; n_steps is per env,
+    # so the rollout stays about 2048 transitions long
+    model = PPO('CnnPolicy', env, verbose=1, n_steps=max(2048 // N_ENVS, 16), learning_rate=0.0003)
+
+    # Callback to save the best model
+    callback = SaveOnBestTrainingRewardCallback(check_freq=max(1000 // N_ENVS, 1), log_dir=log_dir)
+
+    if RESUME:
+        checkpoint = callback.checkpoints.load(callback.checkpoints.best())
+        if checkpoint is not None:
+            model.set_parameters(checkpoint['state'])
+            model.num_timesteps = checkpoint['meta']['step']
+
+    # Train the agent with increased training steps
+    model.learn(total_timesteps=2000000, callback=callback, reset_num_timesteps=not RESUME)
+
+    # Plot the results
+    results_plotter.plot_results([log_dir], 2000000, results_plotter.X_TIMESTEPS, "PPO GalacticShooter")
+    plt.show()
+
+    # Save the final model
+    model.save("GalacticShooterModel")
@@ -3,18 +3,35 @@ import torch.nn as nn
 import torch.optim as optim
 import torch.nn.functional as F
 import os
+import copy
 
 class Linear_QNet(nn.Module):
     def __init__(self, input_size, hidden_size, output_size):
         super().__init__()
         self.linear1 = nn.Linear(input_size, hidden_size)
         self.linear2 = nn.Linear(hidden_size, output_size)
+        # reused input for act(), grown when a bigger batch comes in
+        self._act_input = None
 
     def forward(self, x):
         x = F.relu(self.linear1(x))
         x = self.linear2(x)
         return x
 
+    def act(self, states):
+        # greedy action index for each row of `states` (one per env), without
+        # building an autograd graph or a fresh input tensor every tick
+        states = torch.as_tensor(states)
+        if len(states.shape) == 1:
+            states = torch.unsqueeze(states, 0)
+        n = states.shape[0]
+        if self._act_input is None or self._act_input.shape[0] < n:
+            self._act_input = torch.empty((n, self.linear1.in_features), dtype=torch.float)
+        x = self._act_input[:n]
+        x.copy_(states)
+        with torch.inference_mode():
+            return torch.argmax(self(x), dim=1).numpy()
+
     def save(self, file_name='model.pth'):
         model_folder_path = './model'
         if not os.path.exists(model_folder_path):
@@ -25,37 +42,67 @@ class Linear_QNet(nn.Module):
 
 
 class QTrainer:
-    def __init__(self, model, lr, gamma):
+    def __init__(self, model, lr, gamma, target_update=0, double=False):
         self.lr = lr
         self.gamma = gamma
         self.model = model
         self.optimizer = optim.Adam(model.parameters(), lr=self.lr)
         self.criterion = nn.MSELoss()
+        # with target_update > 0, bootstrap values come from a frozen copy of
+        # the model that is re-synced every target_update training steps;
+        # double picks the next action with the online model (Double DQN)
+        self.target_update = target_update
+        self.double = double
+        self.target_model = copy.deepcopy(model) if target_update > 0 else model
+        self.steps = 0
+        # loss of the latest step, kept as a tensor so reading it is opt-in
+        self.last_loss = None
 
-    def train_step(self, state, action, reward, next_state, done):
-        state = torch.tensor(state, dtype=torch.float)
-        next_state = torch.tensor(next_state, dtype=torch.float)
-        action = torch.tensor(action, dtype=torch.long)
-        reward = torch.tensor(reward, dtype=torch.float)
+    def train_step(self, state, action, reward, next_state, done, weights=None):
+        state = torch.as_tensor(state, dtype=torch.float)
+        next_state = torch.as_tensor(next_state, dtype=torch.float)
+        action = torch.as_tensor(action, dtype=torch.long)
+        reward = torch.as_tensor(reward, dtype=torch.float)
+        done = torch.as_tensor(done, dtype=torch.bool)
 
         if len(state.shape) == 1:
             state = torch.unsqueeze(state, 0)
             next_state = torch.unsqueeze(next_state, 0)
             action = torch.unsqueeze(action, 0)
             reward = torch.unsqueeze(reward, 0)
-            done = (done, )
+            done = torch.unsqueeze(done, 0)
+
+        # actions arrive either one-hot or as indices
+        if len(action.shape) == 2:
+            action = torch.argmax(action, dim=1)
 
         pred = self.model(state)
 
-        target = pred.clone()
-        for idx in range(len(done)):
-            Q_new = reward[idx]
-            if not done[idx]:
-                Q_new = reward[idx] + self.gamma * torch.max(self.model(next_state[idx]))
+        with torch.no_grad():
+            next_q = self.target_model(next_state)
+            if self.double:
+                next_action = torch.argmax(self.model(next_state), dim=1, keepdim=True)
+                next_value = next_q.gather(1, next_action).squeeze(1)
+            else:
+                next_value = torch.max(next_q, dim=1).values
+            Q_new = reward + self.gamma * next_value * ~done
 
-            target[idx][torch.argmax(action[idx]).item()] = Q_new
+        target = pred.detach().clone()
+        target[torch.arange(len(action)), action] = Q_new
 
         self.optimizer.zero_grad()
-        loss = self.criterion(target, pred)
+        if weights is None:
+            loss = self.criterion(target, pred)
+        else:
+            # importance-sampling weights from prioritised replay
+            loss = (torch.as_tensor(weights) * ((target - pred) ** 2).mean(dim=1)).mean()
         loss.backward()
         self.optimizer.step()
+        self.last_loss = loss.detach()
+
+        self.steps += 1
+        if self.target_update > 0 and self.steps % self.target_update == 0:
+            self.target_model.load_state_dict(self.model.state_dict())
+
+        # only the taken action's entry differs, so this is its TD error
+        return (target - pred).detach().abs().sum(dim=1)
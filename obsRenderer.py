@@ -0,0 +1,200 @@
+import time
+import tracemalloc
+import numpy as np
+import cv2
+import pygame
+
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+OBS_SIZE = 84
+
+# cv2.COLOR_RGB2GRAY weights and the cv2.inRange bounds used for bullets
+GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+LOWER_RED = np.array([100, 0, 0])
+UPPER_RED = np.array([255, 100, 100])
+
+
+def area_matrix(size):
+    # (84, size) weights of cv2.INTER_AREA: output cell i averages the source
+    # pixels in [i * scale, (i + 1) * scale), partial pixels by their overlap
+    scale = size / OBS_SIZE
+    edges = np.arange(OBS_SIZE + 1) * scale
+    pixels = np.arange(size)
+    lo = np.maximum(pixels[None, :], edges[:-1, None])
+    hi = np.minimum(pixels[None, :] + 1, edges[1:, None])
+    return (np.clip(hi - lo, 0, None) / scale).astype(np.float32)
+
+
+def sprite_template(image, mask_bullets=True):
+    # Grey level of the sprite as it appears after being blitted onto the
+    # black background and run through the grey + red-mask conversion
+    rgb = pygame.surfarray.array3d(image).transpose(1, 0, 2).astype(np.float32)
+    if image.get_flags() & pygame.SRCALPHA:
+        alpha = pygame.surfarray.array_alpha(image).T.astype(np.float32) / 255
+        rgb = np.rint(rgb * alpha[..., None])
+    gray = np.rint(rgb @ GRAY_WEIGHTS)
+    if mask_bullets:
+        red = np.all((rgb >= LOWER_RED) & (rgb <= UPPER_RED), axis=-1)
+        gray[red] = 0
+    return gray
+
+
+class ObsRenderer:
+    # Rasterises the player, aliens and bullets of a game straight into an
+    # 84x84 observation. Each sprite's template is area-resampled into the few
+    # output cells it covers, which matches grabbing the 800x600 screen and
+    # cv2.resize(INTER_AREA)-ing it, apart from the HUD and sprite overlaps.
+    # Nothing frame-sized is allocated per call and the returned observation
+    # is the renderer's own buffer, overwritten by the next render().
+    def __init__(self, mask_bullets=True):
+        self.mask_bullets = mask_bullets
+        self.rows = area_matrix(SCREEN_HEIGHT)
+        self.cols = area_matrix(SCREEN_WIDTH)
+        self.frame = np.zeros((OBS_SIZE, OBS_SIZE), dtype=np.float32)
+        self.obs = np.zeros((OBS_SIZE, OBS_SIZE, 1), dtype=np.uint8)
+        self.templates = {}
+        self._partial = np.zeros((OBS_SIZE, SCREEN_WIDTH), dtype=np.float32)
+        self._block = np.zeros((OBS_SIZE, OBS_SIZE), dtype=np.float32)
+
+    def render(self, game):
+        self.frame.fill(0)
+        self._draw(game.player, "player")
+        for alien in game.aliens:
+            self._draw(alien, "alien")
+        if not self.mask_bullets:
+            for bullet in game.bullets:
+                self._draw(bullet, "bullet")
+        np.minimum(self.frame, 255, out=self.frame)
+        np.rint(self.frame, out=self.frame)
+        np.copyto(self.obs[..., 0], self.frame, casting='unsafe')
+        return self.obs
+
+    def _draw(self, sprite, kind):
+        template = self.templates.get(kind)
+        if template is None:
+            template = self.templates[kind] = sprite_template(sprite.image, self.mask_bullets)
+
+        rect = sprite.rect
+        x0, x1 = max(rect.left, 0), min(rect.right, SCREEN_WIDTH)
+        y0, y1 = max(rect.top, 0), min(rect.bottom, SCREEN_HEIGHT)
+        if x0 >= x1 or y0 >= y1:
+            return
+        r0 = int(y0 * OBS_SIZE // SCREEN_HEIGHT)
+        r1 = min(-(-y1 * OBS_SIZE // SCREEN_HEIGHT), OBS_SIZE)
+        c0 = int(x0 * OBS_SIZE // SCREEN_WIDTH)
+        c1 = min(-(-x1 * OBS_SIZE // SCREEN_WIDTH), OBS_SIZE)
+
+        patch = template[y0 - rect.top:y1 - rect.top, x0 - rect.left:x1 - rect.left]
+        partial = self._partial[:r1 - r0, :x1 - x0]
+        np.matmul(self.rows[r0:r1, y0:y1], patch, out=partial)
+        block = self._block[:r1 - r0, :c1 - c0]
+        np.matmul(partial, self.cols[c0:c1, x0:x1].T, out=block)
+        self.frame[r0:r1, c0:c1] += block
+
+
+class ObsPipeline:
+    # Full-resolution path: reads the 800x600 surface in place through its
+    # pixel buffer and runs grey conversion, bullet masking and the INTER_AREA
+    # resize into buffers that are allocated once and reused. Per-stage
+    # timings (and, with track_allocations, the bytes Python/NumPy allocated
+    # per call, which needs tracemalloc running) are kept for stats().
+    STAGES = ("grab", "gray", "mask", "resize")
+
+    def __init__(self, mask_bullets=True, track_allocations=False):
+        self.mask_bullets = mask_bullets
+        self.track_allocations = track_allocations
+        self.obs = np.zeros((OBS_SIZE, OBS_SIZE, 1), dtype=np.uint8)
+        self.gray = None
+        self.mask = None
+        self.timings = dict.fromkeys(self.STAGES, 0.0)
+        self.calls = 0
+        self.allocated = 0
+
+    def _setup(self, surface):
+        width, height = surface.get_size()
+        self.gray = np.zeros((height, width), dtype=np.uint8)
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+        if surface.get_bytesize() == 4:
+            # byte position of each channel in a little-endian 32-bit pixel
+            red, green, blue, _ = (shift // 8 for shift in surface.get_shifts())
+            self.gray_code = cv2.COLOR_BGRA2GRAY if red == 2 else cv2.COLOR_RGBA2GRAY
+            self.lower = np.zeros(4, dtype=np.uint8)
+            self.upper = np.full(4, 255, dtype=np.uint8)
+            self.lower[red], self.upper[green], self.upper[blue] = LOWER_RED[0], UPPER_RED[1], UPPER_RED[2]
+        else:
+            self.gray_code = cv2.COLOR_RGB2GRAY
+            self.lower, self.upper = LOWER_RED.astype(np.uint8), UPPER_RED.astype(np.uint8)
+
+    def _pixels(self, surface):
+        if surface.get_bytesize() == 4:
+            width, height = surface.get_size()
+            pixels = np.frombuffer(surface.get_buffer(), dtype=np.uint8)
+            return pixels.reshape(height, surface.get_pitch() // 4, 4)[:, :width]
+        # other depths go through surfarray; cv2 copies the strided view
+        return pygame.surfarray.pixels3d(surface).transpose(1, 0, 2)
+
+    def __call__(self, surface):
+        if self.gray is None:
+            self._setup(surface)
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+
+        t0 = time.perf_counter()
+        pixels = self._pixels(surface)
+        t1 = time.perf_counter()
+        cv2.cvtColor(pixels, self.gray_code, dst=self.gray)
+        t2 = time.perf_counter()
+        if self.mask_bullets:
+            cv2.inRange(pixels, self.lower, self.upper, dst=self.mask)
+            cv2.bitwise_not(self.mask, dst=self.mask)
+            cv2.bitwise_and(self.gray, self.mask, dst=self.gray)
+        t3 = time.perf_counter()
+        cv2.resize(self.gray, (OBS_SIZE, OBS_SIZE), dst=self.obs[..., 0], interpolation=cv2.INTER_AREA)
+        t4 = time.perf_counter()
+        # dropping the view releases the surface lock taken by get_buffer()
+        del pixels
+
+        if self.track_allocations:
+            self.allocated += tracemalloc.get_traced_memory()[1] - before
+        for stage, elapsed in zip(self.STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            self.timings[stage] += elapsed
+        self.calls += 1
+        return self.obs
+
+    def stats(self):
+        calls = max(self.calls, 1)
+        stats = {f"{stage}_ms": total / calls * 1e3 for stage, total in self.timings.items()}
+        stats["calls"] = self.calls
+        if self.track_allocations:
+            stats["bytes_per_call"] = self.allocated / calls
+        return stats
+
+
+class FrameStack:
+    # Ring buffer of the last n frames. Every frame is written twice, at slot
+    # i and i + n, so the n most recent frames are always one contiguous
+    # slice; get() copies them out (oldest first, as channels) in one go, so
+    # what it returns stays valid after later pushes.
+    def __init__(self, n, frame_shape=(OBS_SIZE, OBS_SIZE)):
+        self.n = n
+        self.frames = np.zeros((2 * n, *frame_shape), dtype=np.uint8)
+        self.pos = n - 1
+
+    def reset(self, frame, mask=None):
+        # with a mask, only those rows of a batched stack start over
+        if mask is None:
+            self.frames[:] = frame[..., 0]
+            self.pos = self.n - 1
+        else:
+            self.frames[:, mask] = frame[mask, ..., 0]
+        return self.get()
+
+    def push(self, frame):
+        self.pos = (self.pos + 1) % self.n
+        self.frames[self.pos] = frame[..., 0]
+        self.frames[self.pos + self.n] = frame[..., 0]
+        return self.get()
+
+    def get(self):
+        return np.moveaxis(self.frames[self.pos + 1:self.pos + 1 + self.n], 0, -1).copy()
@@ -0,0 +1,150 @@
+import os
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+
+# Runs one env per worker process. Workers are started with "spawn" by
+# default so each one gets a clean copy of pygame/SDL rather than a forked
+# one. Observations come back through one shared-memory block instead of
+# being pickled through the pipes.
+
+
+def _worker(remote, parent_remote, env_fn, shm_name, index, obs_shape, obs_dtype):
+    parent_remote.close()
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    env = env_fn()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    obs_buf = np.ndarray(obs_shape, dtype=obs_dtype, buffer=shm.buf)[index]
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                obs, reward, terminated, truncated, info = env.step(data)
+                done = terminated or truncated
+                info["TimeLimit.truncated"] = truncated and not terminated
+                if done:
+                    # the env may hand back the same buffer after reset()
+                    info["terminal_observation"] = obs.copy()
+                    obs, _ = env.reset()
+                obs_buf[...] = obs
+                remote.send((reward, done, info))
+            elif cmd == "reset":
+                seed, options = data
+                obs, info = env.reset(seed=seed, options=options)
+                obs_buf[...] = obs
+                remote.send(info)
+            elif cmd == "get_attr":
+                remote.send(getattr(env, data))
+            elif cmd == "set_attr":
+                remote.send(setattr(env, data[0], data[1]))
+            elif cmd == "env_method":
+                name, args, kwargs = data
+                remote.send(getattr(env, name)(*args, **kwargs))
+            elif cmd == "is_wrapped":
+                remote.send(False)
+            elif cmd == "close":
+                env.close()
+                remote.close()
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del obs_buf
+        shm.close()
+
+
+class SharedMemoryVecEnv(VecEnv):
+    def __init__(self, env_fn, n_workers=None, seed=None, start_method="spawn"):
+        # env_fn must be picklable (a class or module-level function), as it is
+        # sent to every worker
+        n_workers = n_workers or os.cpu_count()
+        probe = env_fn()
+        observation_space, action_space = probe.observation_space, probe.action_space
+        probe.close()
+
+        obs_shape = (n_workers, *observation_space.shape)
+        obs_dtype = observation_space.dtype
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(obs_shape)) * obs_dtype.itemsize)
+        self.obs = np.ndarray(obs_shape, dtype=obs_dtype, buffer=self.shm.buf)
+
+        ctx = mp.get_context(start_method)
+        self.remotes, work_remotes = zip(*[ctx.Pipe() for _ in range(n_workers)])
+        self.processes = []
+        for index, (work_remote, remote) in enumerate(zip(work_remotes, self.remotes)):
+            args = (work_remote, remote, env_fn, self.shm.name, index, obs_shape, obs_dtype)
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        self.waiting = False
+        self.closed = False
+        super().__init__(n_workers, observation_space, action_space)
+        if seed is not None:
+            # worker i is seeded with seed + i on the next reset
+            self.seed(seed)
+
+    def step_async(self, actions):
+        for remote, action in zip(self.remotes, actions):
+            remote.send(("step", int(action)))
+        self.waiting = True
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        rewards, dones, infos = zip(*results)
+        # the workers overwrite the shared block on the next step
+        return self.obs.copy(), np.array(rewards, dtype=np.float32), np.array(dones), list(infos)
+
+    def reset(self):
+        for i, remote in enumerate(self.remotes):
+            remote.send(("reset", (self._seeds[i], self._options[i])))
+        self.reset_infos = [remote.recv() for remote in self.remotes]
+        self._reset_seeds()
+        self._reset_options()
+        return self.obs.copy()
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        del self.obs
+        self.shm.close()
+        self.shm.unlink()
+        self.closed = True
+
+    def get_attr(self, attr_name, indices=None):
+        remotes = self._get_target_remotes(indices)
+        for remote in remotes:
+            remote.send(("get_attr", attr_name))
+        return [remote.recv() for remote in remotes]
+
+    def set_attr(self, attr_name, value, indices=None):
+        remotes = self._get_target_remotes(indices)
+        for remote in remotes:
+            remote.send(("set_attr", (attr_name, value)))
+        for remote in remotes:
+            remote.recv()
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        remotes = self._get_target_remotes(indices)
+        for remote in remotes:
+            remote.send(("env_method", (method_name, method_args, method_kwargs)))
+        return [remote.recv() for remote in remotes]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        remotes = self._get_target_remotes(indices)
+        for remote in remotes:
+            remote.send(("is_wrapped", wrapper_class))
+        return [remote.recv() for remote in remotes]
+
+    def _get_target_remotes(self, indices):
+        return [self.remotes[i] for i in self._get_indices(indices)]
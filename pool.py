@@ -0,0 +1,43 @@
+import pygame
+
+# Bullets and aliens come and go every few ticks; instead of building a new
+# sprite (and, for bullets, a new Surface) each time, killed sprites wait in
+# their pool's free list and get() re-spawns one of them in place.
+
+
+class Pool:
+    def __init__(self, factory, capacity=1024):
+        # factory(*args) builds a new sprite; a recycled one gets spawn(*args)
+        self.factory = factory
+        self.capacity = capacity
+        self.free = []
+        self.created = 0
+
+    def get(self, *args):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.spawn(*args)
+            return sprite
+        sprite = self.factory(*args)
+        sprite.pool = self
+        self.created += 1
+        return sprite
+
+    def put(self, sprite):
+        # beyond capacity the sprite is simply dropped
+        if len(self.free) < self.capacity:
+            self.free.append(sprite)
+
+
+class PooledSprite(pygame.sprite.Sprite):
+    pool = None
+
+    def kill(self):
+        # only a live sprite goes back, so killing twice cannot hand it out twice
+        if self.alive():
+            super().kill()
+            if self.pool is not None:
+                self.pool.put(self)
+
+    def spawn(self, *args):
+        raise NotImplementedError
@@ -0,0 +1,123 @@
+import sys
+import json
+import time
+from collections import deque
+
+# Opt-in step profiler. Code under test calls start() when a step begins and
+# lap(name) at the end of every phase; each lap is the time since the previous
+# mark, so phases never overlap and add up to the whole step. Games and envs
+# hold `profiler = None` by default and guard each lap with a None check, so
+# a disabled profiler costs one attribute test per phase.
+# Not thread-safe: give every thread its own Profiler and merge() them.
+
+# histogram bucket k counts laps of [2^(k-1), 2^k) microseconds; bucket 0 is < 1 us
+N_BUCKETS = 32
+
+
+class Phase:
+    __slots__ = ('count', 'total', 'min', 'max', 'hist')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.hist = [0] * N_BUCKETS
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        if duration < self.min:
+            self.min = duration
+        if duration > self.max:
+            self.max = duration
+        self.hist[min(int(duration * 1e6).bit_length(), N_BUCKETS - 1)] += 1
+
+    def percentile(self, q):
+        # upper edge of the bucket holding the q-th percentile, in seconds
+        target = q / 100 * self.count
+        seen = 0
+        for k, n in enumerate(self.hist):
+            seen += n
+            if n and seen >= target:
+                return min(2 ** k * 1e-6, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'hist': self.hist,
+        }
+
+
+class Profiler:
+    def __init__(self, trace=False, trace_capacity=200_000):
+        self.phases = {}
+        # (name, start, duration) of the most recent laps, for chrome traces
+        self.trace = deque(maxlen=trace_capacity) if trace else None
+        self.last = time.perf_counter()
+
+    def start(self):
+        self.last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        duration = now - self.last
+        self.last = now
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase()
+        phase.add(duration)
+        if self.trace is not None:
+            self.trace.append((name, now - duration, duration))
+
+    def merge(self, other):
+        for name, theirs in other.phases.items():
+            phase = self.phases.setdefault(name, Phase())
+            phase.count += theirs.count
+            phase.total += theirs.total
+            phase.min = min(phase.min, theirs.min)
+            phase.max = max(phase.max, theirs.max)
+            phase.hist = [a + b for a, b in zip(phase.hist, theirs.hist)]
+
+    def to_dict(self):
+        return {'phases': {name: phase.to_dict() for name, phase in self.phases.items()}}
+
+    def save(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=1)
+
+    def save_chrome_trace(self, path):
+        # load in chrome://tracing or ui.perfetto.dev
+        if self.trace is None:
+            raise ValueError('Profiler was created with trace=False')
+        events = [{'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6, 'pid': 0, 'tid': 0}
+                  for name, start, duration in self.trace]
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+
+def breakdown(summary):
+    # per-phase table of a to_dict()/save() summary, slowest phase first
+    phases = summary['phases']
+    total = sum(p['total'] for p in phases.values()) or 1.0
+    lines = [f'{"phase":<14}{"count":>10}{"total s":>10}{"share":>8}{"mean us":>10}{"p50 us":>9}{"p99 us":>9}{"max us":>10}']
+    for name, p in sorted(phases.items(), key=lambda item: -item[1]['total']):
+        lines.append(f'{name:<14}{p["count"]:>10}{p["total"]:>10.3f}{p["total"] / total:>8.1%}'
+                     f'{p["mean"] * 1e6:>10.1f}{p["p50"] * 1e6:>9.0f}{p["p99"] * 1e6:>9.0f}{p["max"] * 1e6:>10.0f}')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print('usage: python profiler.py profile.json')
+        sys.exit(1)
+    with open(sys.argv[1]) as file:
+        print(breakdown(json.load(file)))
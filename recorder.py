@@ -0,0 +1,166 @@
+import os
+import sys
+import random
+import struct
+from collections import namedtuple
+import numpy as np
+
+# Episodes of test.GalacticShooterAI stored as the seed they were reset with
+# plus their actions, packed 2 bits per play_step. The game is deterministic
+# given both, so replaying the actions re-creates every frame.
+#
+# File: MAGIC, then per episode a HEADER (seed, max_aliens, steps, final
+# score, final lives) followed by ceil(steps / 4) bytes of actions, the
+# first action of each byte in its low bits.
+#
+#   python recorder.py info episodes.bin
+#   python recorder.py verify episodes.bin     re-simulate, exit 1 on mismatch
+#   python recorder.py watch episodes.bin 3    show episode 3 in a window
+
+MAGIC = b'GSR1'
+HEADER = struct.Struct('<QHIih')
+
+Episode = namedtuple('Episode', 'seed max_aliens score lives actions')
+
+
+def pack(actions):
+    actions = np.asarray(actions, dtype=np.uint8)
+    padded = np.zeros(-(-len(actions) // 4) * 4, dtype=np.uint8)
+    padded[:len(actions)] = actions
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] | quads[:, 1] << 2 | quads[:, 2] << 4 | quads[:, 3] << 6).tobytes()
+
+
+def unpack(data, n):
+    packed = np.frombuffer(data, dtype=np.uint8)
+    quads = np.stack([packed & 3, packed >> 2 & 3, packed >> 4 & 3, packed >> 6 & 3], axis=1)
+    return quads.reshape(-1)[:n]
+
+
+class EpisodeRecorder:
+    # Attach to a game with attach(game); from then on every reset() starts
+    # a new episode and every play_step() appends its action. A reset without
+    # a seed gets one from this recorder, so every episode stays replayable.
+    def __init__(self, path, seed=None):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'ab')
+        if new:
+            self.file.write(MAGIC)
+        self.seeds = random.Random(seed)
+        self.actions = bytearray()
+        self.game = None
+        self.seed = None
+        self.episodes = 0
+
+    def attach(self, game, seed=None):
+        game.recorder = self
+        game.reset(seed=seed)
+
+    def new_seed(self):
+        return self.seeds.getrandbits(63)
+
+    def begin(self, game, seed):
+        # returns the seed to reset the game with: the header holds an
+        # unsigned 64-bit seed, so other ints are reduced to one
+        if not isinstance(seed, int):
+            raise TypeError(f'recorded episodes need an int seed, not {type(seed).__name__}')
+        seed %= 2 ** 64
+        self.end()
+        self.game = game
+        self.seed = seed
+        self.actions.clear()
+        return seed
+
+    def record(self, action):
+        self.actions.append(action.value)
+
+    def end(self):
+        if self.game is None:
+            return
+        game = self.game
+        self.file.write(HEADER.pack(self.seed, game.max_aliens, len(self.actions), game.score, game.lives))
+        self.file.write(pack(self.actions))
+        self.episodes += 1
+        self.game = None
+
+    def close(self):
+        self.end()
+        self.file.close()
+
+
+def load(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f'{path} is not an episode file')
+    episodes = []
+    offset = len(MAGIC)
+    while offset < len(data):
+        seed, max_aliens, steps, score, lives = HEADER.unpack_from(data, offset)
+        offset += HEADER.size
+        size = -(-steps // 4)
+        episodes.append(Episode(seed, max_aliens, score, lives, unpack(data[offset:offset + size], steps)))
+        offset += size
+    return episodes
+
+
+def simulate(episode, game=None, draw=False):
+    # Re-runs the episode (on a new headless game unless one is given);
+    # yields (step, reward, done) after every play_step, with the frame
+    # drawn to game.display if draw
+    from test import GalacticShooterAI, Direction
+    if game is None:
+        game = GalacticShooterAI(headless=True, max_aliens=episode.max_aliens)
+    game.reset(seed=episode.seed)
+    directions = list(Direction)
+    for step, action in enumerate(episode.actions):
+        reward, done, score = game.play_step(directions[action])
+        if draw:
+            game.draw()
+        yield step, reward, done
+
+
+def verify(episode, game=None):
+    # '' if replaying ends with the recorded score and lives, else what differs
+    from test import GalacticShooterAI
+    if game is None:
+        game = GalacticShooterAI(headless=True, max_aliens=episode.max_aliens)
+    for step, reward, done in simulate(episode, game):
+        if done and step != len(episode.actions) - 1:
+            return f'game over early, at step {step} of {len(episode.actions)}'
+    if (game.score, game.lives) != (episode.score, episode.lives):
+        return f'score/lives {game.score}/{game.lives}, recorded {episode.score}/{episode.lives}'
+    return ''
+
+
+def watch(episode):
+    # a windowed game draws every step at 60 FPS by itself
+    from test import GalacticShooterAI
+    for _ in simulate(episode, GalacticShooterAI(headless=False, max_aliens=episode.max_aliens)):
+        pass
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] not in ('info', 'verify', 'watch'):
+        print('usage: python recorder.py info|verify|watch episodes.bin [episode]')
+        sys.exit(1)
+    command, path = sys.argv[1], sys.argv[2]
+    if command != 'watch':
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    episodes = load(path)
+    if command == 'info':
+        steps = sum(len(e.actions) for e in episodes)
+        print(f'{len(episodes)} episodes, {steps} steps, {os.path.getsize(path)} bytes')
+        for i, e in enumerate(episodes):
+            print(f'{i:5d} seed {e.seed:<20d} steps {len(e.actions):7d} score {e.score:5d} lives {e.lives}')
+    elif command == 'verify':
+        failed = 0
+        for i, e in enumerate(episodes):
+            problem = verify(e)
+            if problem:
+                failed += 1
+                print(f'episode {i}: {problem}')
+        print(f'{len(episodes) - failed}/{len(episodes)} episodes replay exactly')
+        sys.exit(1 if failed else 0)
+    else:
+        watch(episodes[int(sys.argv[3]) if len(sys.argv) > 3 else 0])
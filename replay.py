@@ -0,0 +1,160 @@
+from collections import namedtuple
+import numpy as np
+import torch
+
+Batch = namedtuple('Batch', ['states', 'actions', 'rewards', 'next_states', 'dones', 'indices', 'weights'])
+
+
+class ReplayBuffer:
+    # Circular buffer with one preallocated NumPy column per field. Inserting
+    # is O(1) and a batch is gathered with a single fancy index per column.
+    def __init__(self, capacity, state_size, seed=None):
+        self.capacity = capacity
+        self.states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.pos = 0
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        i = self.pos
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def sample(self, batch_size):
+        # without replacement; asking for more than is stored returns everything
+        batch_size = min(batch_size, self.size)
+        indices = self.rng.choice(self.size, batch_size, replace=False)
+        return self._batch(indices, None)
+
+    def _batch(self, indices, weights):
+        return Batch(
+            torch.from_numpy(self.states[indices]),
+            torch.from_numpy(self.actions[indices]),
+            torch.from_numpy(self.rewards[indices]),
+            torch.from_numpy(self.next_states[indices]),
+            torch.from_numpy(self.dones[indices]),
+            indices,
+            None if weights is None else torch.from_numpy(weights),
+        )
+
+    def state_dict(self):
+        # views of the filled part, like torch's state_dict(); copy before
+        # handing them to another thread
+        n = self.size
+        return {
+            'states': self.states[:n],
+            'actions': self.actions[:n],
+            'rewards': self.rewards[:n],
+            'next_states': self.next_states[:n],
+            'dones': self.dones[:n],
+            'pos': self.pos,
+        }
+
+    def load_state_dict(self, state):
+        n = len(state['actions'])
+        self.states[:n] = state['states']
+        self.actions[:n] = state['actions']
+        self.rewards[:n] = state['rewards']
+        self.next_states[:n] = state['next_states']
+        self.dones[:n] = state['dones']
+        self.size = n
+        self.pos = state['pos']
+
+
+class SumTree:
+    # Binary tree over `capacity` leaves stored in one array; node i has
+    # children 2i and 2i + 1 and the root (index 1) holds the total.
+    def __init__(self, capacity):
+        self.leaves = 1
+        while self.leaves < capacity:
+            self.leaves *= 2
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        return self.tree[indices + self.leaves]
+
+    def update(self, indices, values):
+        nodes = np.asarray(indices) + self.leaves
+        self.tree[nodes] = values
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values):
+        # leaf index whose prefix-sum interval contains each value
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = values.copy()
+        while nodes[0] < self.leaves:
+            left = self.tree[2 * nodes]
+            go_right = values > left
+            values -= left * go_right
+            nodes = 2 * nodes + go_right
+        return nodes - self.leaves
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    # Proportional prioritised replay: transitions are drawn with probability
+    # p^alpha / sum(p^alpha) and come back with importance-sampling weights.
+    def __init__(self, capacity, state_size, alpha=0.6, beta=0.4, eps=1e-5, seed=None):
+        super().__init__(capacity, state_size, seed=seed)
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+
+    def add(self, state, action, reward, next_state, done):
+        i = super().add(state, action, reward, next_state, done)
+        self.tree.update(np.array([i]), self.max_priority ** self.alpha)
+        return i
+
+    def sample(self, batch_size):
+        batch_size = min(batch_size, self.size)
+        # one draw per equal slice of the total priority mass
+        segment = self.tree.total() / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        indices = np.minimum(self.tree.find(values), self.size - 1)
+        probs = self.tree.get(indices) / self.tree.total()
+        weights = (self.size * probs) ** -self.beta
+        weights /= weights.max()
+        return self._batch(indices, weights.astype(np.float32))
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.eps
+        self.max_priority = max(self.max_priority, priorities.max())
+        self.tree.update(indices, priorities ** self.alpha)
+
+    def state_dict(self):
+        # sum-tree leaves hold priority^alpha, stored as they are
+        state = super().state_dict()
+        state['priorities'] = self.tree.get(np.arange(self.size))
+        state['max_priority'] = self.max_priority
+        return state
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        if self.size == 0:
+            return
+        if 'priorities' in state:
+            self.max_priority = state['max_priority']
+            self.tree.update(np.arange(self.size), state['priorities'])
+        else:
+            # saved without priorities: every transition starts out equal
+            self.tree.update(np.arange(self.size), self.max_priority ** self.alpha)
@@ -0,0 +1,114 @@
+import pygame
+
+# Dirty-rect drawing for the windowed games. Sprites live in a
+# pygame.sprite.RenderUpdates group, which erases their old positions and
+# reports every rect it touched; HUD items only re-render their text when
+# the value they show changes. draw() returns the rects that changed, to be
+# pushed with pygame.display.update(rects) instead of a full flip.
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+
+class HudText:
+    def __init__(self, font, fmt, pos, value=None, color=WHITE):
+        self.font = font
+        self.fmt = fmt
+        self.pos = pos
+        self.color = color
+        self.value = None
+        self.surface = None
+        self.rect = pygame.Rect(pos, (0, 0))
+        # area the item covered before its last change, still to be erased
+        self.stale = None
+        self.changed = True
+        self.set(value)
+
+    def set(self, value):
+        if value == self.value and self.surface is not None:
+            return
+        self.value = value
+        self.stale = self.rect if self.stale is None else self.stale.union(self.rect)
+        self.surface = self.font.render(self.fmt.format(value), True, self.color)
+        self.rect = self.surface.get_rect(topleft=self.pos)
+        self.changed = True
+
+    def blit(self, surface):
+        surface.blit(self.surface, self.rect)
+
+
+class HudIcons:
+    # `value` copies of an image in a row, e.g. one heart per life
+    def __init__(self, image, pos, spacing, value=0):
+        self.image = image
+        self.pos = pos
+        self.spacing = spacing
+        self.value = None
+        self.rect = pygame.Rect(pos, (0, 0))
+        self.stale = None
+        self.changed = True
+        self.set(value)
+
+    def set(self, value):
+        if value == self.value:
+            return
+        self.value = value
+        self.stale = self.rect if self.stale is None else self.stale.union(self.rect)
+        width, height = self.image.get_size()
+        count = max(value, 0)
+        self.rect = pygame.Rect(self.pos, (width + (count - 1) * self.spacing if count else 0, height))
+        self.changed = True
+
+    def blit(self, surface):
+        x, y = self.pos
+        for i in range(self.value):
+            surface.blit(self.image, (x + i * self.spacing, y))
+
+
+class DirtyRenderer:
+    def __init__(self, screen, hud=(), color=BLACK):
+        self.screen = screen
+        self.background = pygame.Surface(screen.get_size())
+        self.background.fill(color)
+        self.hud = list(hud)
+        self.full = True
+
+    def invalidate(self):
+        # the next draw() repaints (and reports) the whole screen
+        self.full = True
+
+    def draw(self, group):
+        screen = self.screen
+        if self.full:
+            screen.blit(self.background, (0, 0))
+            group.draw(screen)
+            for item in self.hud:
+                item.blit(screen)
+                item.stale = None
+                item.changed = False
+            self.full = False
+            return [screen.get_rect()]
+
+        # rects sprites covered last frame (or just lost) and cover now
+        moved = [rect for rect in group.spritedict.values() if rect] + group.lostsprites
+        moved += [sprite.rect for sprite in group]
+        group.clear(screen, self.background)
+        dirty = []
+        for item in self.hud:
+            if item.stale is not None:
+                screen.blit(self.background, item.stale, item.stale)
+                dirty.append(item.stale)
+                item.stale = None
+        # HUD goes on top of the sprites, so an item that changed, or that a
+        # sprite or an erased area touches, is erased now and blitted again
+        # after the sprites (antialiased text must not be blended twice)
+        redraw = [item for item in self.hud
+                  if item.changed or item.rect.collidelist(moved) != -1 or item.rect.collidelist(dirty) != -1]
+        for item in redraw:
+            screen.blit(self.background, item.rect, item.rect)
+        dirty += group.draw(screen)
+        for item in redraw:
+            item.blit(screen)
+            dirty.append(item.rect)
+            item.changed = False
+        return dirty
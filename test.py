@@ -1,10 +1,10 @@
 import pygame
 import random
-import os
 from enum import Enum
-
-pygame.init()
-font = pygame.font.Font(None, 25)
+import assets
+from collision import groupcollide
+from pool import Pool, PooledSprite
+from screenRenderer import DirtyRenderer, HudText, HudIcons
 
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
@@ -12,22 +12,10 @@ SCREEN_HEIGHT = 600
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Infinite Galactic Shooter")
-
-player_image = pygame.image.load(os.path.join("images", "rocket-ship.png")).convert_alpha()
-player_image = pygame.transform.scale(player_image, (50, 50))
-
-alien_image = pygame.image.load(os.path.join("images", "space-invaders.png")).convert_alpha()
-alien_image = pygame.transform.scale(alien_image, (40, 40))
-
-life_image = pygame.image.load(os.path.join("images", "heart.png")).convert_alpha()
-life_image = pygame.transform.scale(life_image, (25, 25))
-
 class Player(pygame.sprite.Sprite):
     def __init__(self):
         super().__init__()
-        self.image = player_image
+        self.image = assets.image("rocket-ship.png", (50, 50))
         self.rect = self.image.get_rect()
         self.rect.centerx = SCREEN_WIDTH // 2
         self.rect.bottom = SCREEN_HEIGHT - 10
@@ -37,41 +25,49 @@ class Player(pygame.sprite.Sprite):
         self.rect.x += self.speed_x
         self.rect.x = max(0, min(SCREEN_WIDTH - self.rect.width, self.rect.x))
 
-    def shoot(self, bullets, all_sprites):
-        bullet = Bullet(self.rect.centerx, self.rect.top)
+    def shoot(self, bullets, all_sprites, pool=None):
+        if pool is None:
+            bullet = Bullet(self.rect.centerx, self.rect.top)
+        else:
+            bullet = pool.get(self.rect.centerx, self.rect.top)
         all_sprites.add(bullet)
         bullets.add(bullet)
 
-class Bullet(pygame.sprite.Sprite):
+class Bullet(PooledSprite):
     def __init__(self, x, y):
         super().__init__()
-        self.image = pygame.Surface((3, 15))
-        self.image.fill((255, 0, 0))
+        # every bullet draws the same surface
+        self.image = assets.solid((3, 15), (255, 0, 0))
         self.rect = self.image.get_rect()
+        self.speed_y = -10
+        self.spawn(x, y)
+
+    def spawn(self, x, y):
         self.rect.centerx = x
         self.rect.bottom = y
-        self.speed_y = -10
 
     def update(self):
         self.rect.y += self.speed_y
         if self.rect.bottom < 0:
             self.kill()
 
-class Alien(pygame.sprite.Sprite):
-    def __init__(self):
+class Alien(PooledSprite):
+    def __init__(self, rng=random):
         super().__init__()
-        self.image = alien_image
+        self.image = assets.image("space-invaders.png", (40, 40))
         self.rect = self.image.get_rect()
-        self.rect.x = random.randrange(SCREEN_WIDTH - self.rect.width)
-        self.rect.y = random.randrange(-100, -40)
-        self.speed_y = random.randrange(1, 3)
+        self.rng = rng
+        self.spawn()
+
+    def spawn(self):
+        self.rect.x = self.rng.randrange(SCREEN_WIDTH - self.rect.width)
+        self.rect.y = self.rng.randrange(-100, -40)
+        self.speed_y = self.rng.randrange(1, 3)
 
     def update(self):
         self.rect.y += self.speed_y
         if self.rect.top > SCREEN_HEIGHT:
-            self.rect.x = random.randrange(SCREEN_WIDTH - self.rect.width)
-            self.rect.y = random.randrange(-100, -40)
-            self.speed_y = random.randrange(1, 3)
+            self.spawn()
         # print(f"alien position ({self.rect.x}, {self.rect.y})") 
 
 class Direction(Enum):
@@ -81,17 +77,48 @@ class Direction(Enum):
     DO_NOTHING = 3
 
 class GalacticShooterAI:
-    def __init__(self):
-        self.display = screen 
+    def __init__(self, headless=False, seed=None, max_aliens=1):
+        # headless games skip the event pump, drawing and the 60 FPS cap;
+        # call draw() or update_ui() explicitly when a frame is needed
+        self.headless = headless
+        # aliens on screen before spawning stops; raise it for swarm variants
+        self.max_aliens = max_aliens
+        # set to a profiler.Profiler to time every phase of play_step
+        self.profiler = None
+        # set through recorder.EpisodeRecorder.attach to log episodes
+        self.recorder = None
+        # headless games draw offscreen, so they never open a window
+        self.display = assets.offscreen() if headless else assets.window()
         self.clock = pygame.time.Clock()
+        # every spawn goes through this game's own stream, so the same seed
+        # and actions always replay the same trajectory
+        self.rng = random.Random(seed)
+        # killed bullets and aliens are recycled, so long runs stop allocating
+        self.bullet_pool = Pool(Bullet)
+        self.alien_pool = Pool(lambda: Alien(self.rng))
+        # windowed games track what moved and redraw only that
+        self.all_sprites = pygame.sprite.Group() if headless else pygame.sprite.RenderUpdates()
+        self.aliens = pygame.sprite.Group()
+        self.bullets = pygame.sprite.Group()
+        self.score_text = HudText(assets.font(25), "Score: {}", (10, 10))
+        self.life_icons = HudIcons(assets.image("heart.png", (25, 25)), (85, 85), 40)
+        self.renderer = None if headless else DirtyRenderer(self.display, [self.score_text, self.life_icons])
         self.reset()
 
-    def reset(self):
+    def reset(self, seed=None):
+        if self.recorder is not None:
+            if seed is None:
+                seed = self.recorder.new_seed()
+            # the game uses the seed as recorded, so replays stay exact
+            seed = self.recorder.begin(self, seed)
+        if seed is not None:
+            self.rng.seed(seed)
+        for sprite in self.bullets.sprites() + self.aliens.sprites():
+            sprite.kill()
+        self.all_sprites.empty()
         self.player = Player()
         self.direction = Direction.DO_NOTHING
-        self.all_sprites = pygame.sprite.Group(self.player)
-        self.aliens = pygame.sprite.Group()
-        self.bullets = pygame.sprite.Group()
+        self.all_sprites.add(self.player)
         self.score = 0
         self.lives = 3
         self.steps_survived = 0
@@ -99,19 +126,31 @@ class GalacticShooterAI:
         self.place_alien()
 
     def place_alien(self):
-        alien = Alien()
+        alien = self.alien_pool.get()
         self.all_sprites.add(alien)
         self.aliens.add(alien)
         
 
     def play_step(self, action):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                quit()
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+        if self.recorder is not None:
+            self.recorder.record(action)
+        if not self.headless:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    quit()
+            if prof is not None:
+                prof.lap('events')
         
         self.move(action)
+        if prof is not None:
+            prof.lap('move')
         self.all_sprites.update()
+        if prof is not None:
+            prof.lap('update')
 
         reward = 0
         game_over = False
@@ -120,6 +159,8 @@ class GalacticShooterAI:
         if self.is_collision():
             game_over = True
             reward -= 10
+            if prof is not None:
+                prof.lap('collide')
             return reward, game_over, self.score
         
         for alien in self.aliens:
@@ -130,17 +171,26 @@ class GalacticShooterAI:
                 self.lives -= 1
                 alien.kill()
 
-        hits = pygame.sprite.groupcollide(self.bullets, self.aliens, True, True)
+        hits = groupcollide(self.bullets, self.aliens, True, True)
         for hit in hits:
             self.score += 1
             reward += 10
             self.place_alien()
+        if prof is not None:
+            prof.lap('collide')
             
-        if len(self.aliens) < 1 and random.random() < 0.02:
+        if len(self.aliens) < self.max_aliens and self.rng.random() < 0.02:
             self.place_alien()
-
-        self.update_ui()
-        self.clock.tick(60)
+        if prof is not None:
+            prof.lap('spawn')
+
+        if not self.headless:
+            self.update_ui()
+            if prof is not None:
+                prof.lap('draw')
+            self.clock.tick(60)
+            if prof is not None:
+                prof.lap('tick')
         return reward, game_over, self.score
 
     def is_collision(self):
@@ -152,16 +202,25 @@ class GalacticShooterAI:
         return False
 
     def update_ui(self):
+        if self.renderer is None:
+            self.draw()
+            return
+        self.score_text.set(self.score)
+        self.life_icons.set(self.lives)
+        pygame.display.update(self.renderer.draw(self.all_sprites))
+
+    def draw(self):
+        # full redraw of the frame, e.g. for screen observations
         self.display.fill(BLACK)
         self.all_sprites.draw(self.display)
 
-        score_text = font.render(f"Score: {self.score}", True, WHITE)
-        self.display.blit(score_text, (10, 10))
-
-        for i in range(self.lives):
-            self.display.blit(life_image, (85 + i * 40, 85))
-
-        pygame.display.flip()
+        self.score_text.set(self.score)
+        self.score_text.blit(self.display)
+        self.life_icons.set(self.lives)
+        self.life_icons.blit(self.display)
+        if self.renderer is not None:
+            # the window now differs from what the renderer last pushed
+            self.renderer.invalidate()
 
     def move(self, action):
         # print(f"action: {action}")
@@ -170,7 +229,7 @@ class GalacticShooterAI:
         elif action == Direction.RIGHT:
             self.player.speed_x = 3
         elif action == Direction.SHOOT:
-            self.player.shoot(self.bullets, self.all_sprites)
+            self.player.shoot(self.bullets, self.all_sprites, self.bullet_pool)
         elif action == Direction.DO_NOTHING:
             self.player.speed_x = 0
         self.player.update()
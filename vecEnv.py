@@ -0,0 +1,343 @@
+import numpy as np
+import gymnasium as gym
+from gymnasium.vector import VectorEnv, AutoresetMode
+from gymnasium.vector.utils import batch_space
+from stable_baselines3.common.vec_env import VecEnv
+import assets
+from obsRenderer import area_matrix, sprite_template, FrameStack
+
+# Same rules as test.GalacticShooterAI, but every game lives in a row of
+# struct-of-arrays NumPy buffers and all N games advance in one step() call.
+
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+OBS_SIZE = 84
+
+PLAYER_WIDTH = 50
+PLAYER_HEIGHT = 50
+PLAYER_Y = SCREEN_HEIGHT - 10 - PLAYER_HEIGHT
+PLAYER_SPEED = 3
+ALIEN_WIDTH = 40
+ALIEN_HEIGHT = 40
+BULLET_WIDTH = 3
+BULLET_HEIGHT = 15
+BULLET_SPEED = -10
+SPAWN_CHANCE = 0.02
+
+PLAYER_IMAGE = ("rocket-ship.png", (PLAYER_WIDTH, PLAYER_HEIGHT))
+ALIEN_IMAGE = ("space-invaders.png", (ALIEN_WIDTH, ALIEN_HEIGHT))
+# zero border around the area matrices, at least the largest sprite extent
+PAD = 64
+
+LEFT, RIGHT, SHOOT, DO_NOTHING = range(4)
+
+NO_BULLET = np.iinfo(np.int64).max
+
+
+class VecGalacticShooter:
+    def __init__(self, num_games, max_aliens=8, max_bullets=64, alien_limit=1, seed=None):
+        # a bullet lives ~55 ticks and at most one is fired per tick, so 64
+        # ring-buffer slots never overwrite a live bullet
+        self.num_games = num_games
+        self.max_aliens = max_aliens
+        self.max_bullets = max_bullets
+        self.alien_limit = alien_limit
+        self.rng = np.random.default_rng(seed)
+
+        n = num_games
+        self.player_x = np.zeros(n, dtype=np.int32)
+        self.player_speed = np.zeros(n, dtype=np.int32)
+
+        self.alien_x = np.zeros((n, max_aliens), dtype=np.int32)
+        self.alien_y = np.zeros((n, max_aliens), dtype=np.int32)
+        self.alien_speed = np.zeros((n, max_aliens), dtype=np.int32)
+        self.alien_alive = np.zeros((n, max_aliens), dtype=bool)
+
+        self.bullet_x = np.zeros((n, max_bullets), dtype=np.int32)
+        self.bullet_y = np.zeros((n, max_bullets), dtype=np.int32)
+        self.bullet_alive = np.zeros((n, max_bullets), dtype=bool)
+        # firing order, needed to reproduce groupcollide's "first bullet wins"
+        self.bullet_seq = np.zeros((n, max_bullets), dtype=np.int64)
+        self.shots = np.zeros(n, dtype=np.int64)
+
+        self.score = np.zeros(n, dtype=np.int32)
+        self.lives = np.zeros(n, dtype=np.int32)
+        self.steps_survived = np.zeros(n, dtype=np.int32)
+
+        # INTER_AREA weights and sprite templates shared with ObsRenderer;
+        # the templates are loaded on the first render_obs()
+        self.rows = _padded(area_matrix(SCREEN_HEIGHT))
+        self.cols = _padded(area_matrix(SCREEN_WIDTH))
+        self.templates = None
+
+        self.reset()
+
+    def seed(self, seed):
+        self.rng = np.random.default_rng(seed)
+
+    def reset(self, mask=None):
+        if mask is None:
+            mask = np.ones(self.num_games, dtype=bool)
+        self.player_x[mask] = SCREEN_WIDTH // 2 - PLAYER_WIDTH // 2
+        self.player_speed[mask] = 0
+        self.alien_alive[mask] = False
+        self.bullet_alive[mask] = False
+        self.shots[mask] = 0
+        self.score[mask] = 0
+        self.lives[mask] = 3
+        self.steps_survived[mask] = 0
+        self.place_aliens(mask.astype(np.int32))
+
+    def place_aliens(self, counts):
+        # counts[i] aliens are spawned into game i; a game with no free slot
+        # drops the extra spawns
+        counts = counts.copy()
+        while True:
+            games = np.flatnonzero(counts > 0)
+            if len(games) == 0:
+                break
+            counts[games] -= 1
+            slots = np.argmin(self.alien_alive[games], axis=1)
+            free = ~self.alien_alive[games, slots]
+            games, slots = games[free], slots[free]
+            k = len(games)
+            self.alien_x[games, slots] = self.rng.integers(0, SCREEN_WIDTH - ALIEN_WIDTH, k)
+            self.alien_y[games, slots] = self.rng.integers(-100, -40, k)
+            self.alien_speed[games, slots] = self.rng.integers(1, 3, k)
+            self.alien_alive[games, slots] = True
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        n = self.num_games
+        rewards = np.zeros(n, dtype=np.float32)
+
+        self.player_speed[actions == LEFT] = -PLAYER_SPEED
+        self.player_speed[actions == RIGHT] = PLAYER_SPEED
+        self.player_speed[actions == DO_NOTHING] = 0
+
+        # bullets spawn from the player's position before it moves
+        firing = np.flatnonzero(actions == SHOOT)
+        slots = self.shots[firing] % self.max_bullets
+        self.bullet_x[firing, slots] = self.player_x[firing] + PLAYER_WIDTH // 2 - BULLET_WIDTH // 2
+        self.bullet_y[firing, slots] = PLAYER_Y - BULLET_HEIGHT
+        self.bullet_seq[firing, slots] = self.shots[firing]
+        self.bullet_alive[firing, slots] = True
+        self.shots[firing] += 1
+
+        # the player is updated twice per tick: once in move() and once with all_sprites
+        for _ in range(2):
+            np.clip(self.player_x + self.player_speed, 0, SCREEN_WIDTH - PLAYER_WIDTH, out=self.player_x)
+        self.bullet_y += BULLET_SPEED
+        self.bullet_alive &= self.bullet_y + BULLET_HEIGHT >= 0
+        self.alien_y += self.alien_speed
+        self.steps_survived += 1
+
+        # player/alien collision, which ends the step early once lives run out
+        hit_player = self.alien_alive & self._overlaps(
+            self.player_x[:, None], PLAYER_Y, PLAYER_WIDTH, PLAYER_HEIGHT,
+            self.alien_x, self.alien_y, ALIEN_WIDTH, ALIEN_HEIGHT)
+        self.alien_alive &= ~hit_player
+        self.lives -= hit_player.any(axis=1)
+        crashed = self.lives <= 0
+        active = ~crashed
+
+        escaped = self.alien_alive & (self.alien_y > SCREEN_HEIGHT - 10) & active[:, None]
+        n_escaped = escaped.sum(axis=1)
+        rewards -= 10 * n_escaped
+        self.lives -= n_escaped
+        self.alien_alive &= ~escaped
+
+        # bullets are checked in firing order and each kills every alien it
+        # touches, so an alien belongs to the earliest bullet overlapping it
+        # and a bullet scores once if it owns at least one alien
+        contact = (self.bullet_alive[:, :, None] & self.alien_alive[:, None, :] & active[:, None, None]
+                   & self._overlaps(self.bullet_x[:, :, None], self.bullet_y[:, :, None], BULLET_WIDTH, BULLET_HEIGHT,
+                                    self.alien_x[:, None, :], self.alien_y[:, None, :], ALIEN_WIDTH, ALIEN_HEIGHT))
+        owner = np.where(contact, self.bullet_seq[:, :, None], NO_BULLET).min(axis=1)
+        self.alien_alive &= owner == NO_BULLET
+        scored = (contact & (self.bullet_seq[:, :, None] == owner[:, None, :])).any(axis=2)
+        self.bullet_alive &= ~scored
+        hits = scored.sum(axis=1)
+        self.score += hits
+        rewards += 10 * hits
+        self.place_aliens(hits)
+
+        empty = active & (self.alien_alive.sum(axis=1) < self.alien_limit) & (self.rng.random(n) < SPAWN_CHANCE)
+        self.place_aliens(empty.astype(np.int32))
+
+        rewards[crashed] = -10
+        # unlike play_step, an episode always ends as soon as lives reach zero
+        terminated = self.lives <= 0
+        return rewards, terminated
+
+    @staticmethod
+    def _overlaps(ax, ay, aw, ah, bx, by, bw, bh):
+        # pygame.Rect.colliderect
+        return (ax < bx + bw) & (bx < ax + aw) & (ay < by + bh) & (by < ay + ah)
+
+    def render_obs(self, out):
+        # Draws every player and alien from the same grey templates as
+        # obsRenderer.ObsRenderer, area-resampled into the 84x84 cells they
+        # cover, into an (N, 84, 84, 1) buffer. Bullets are masked out of the
+        # observation, exactly as in the pixel pipeline.
+        if self.templates is None:
+            self.templates = {name: sprite_template(assets.image(*image)).astype(np.float32)
+                              for name, image in (("player", PLAYER_IMAGE), ("alien", ALIEN_IMAGE))}
+        n = self.num_games
+        frame = np.zeros(n * OBS_SIZE * OBS_SIZE, dtype=np.float32)
+        self._draw(frame, np.arange(n), self.player_x, np.full(n, PLAYER_Y), self.templates["player"])
+        games, slots = np.nonzero(self.alien_alive)
+        self._draw(frame, games, self.alien_x[games, slots], self.alien_y[games, slots], self.templates["alien"])
+        np.minimum(frame, 255, out=frame)
+        np.rint(frame, out=frame)
+        np.copyto(out.reshape(-1), frame, casting='unsafe')
+        return out
+
+    def _draw(self, frame, games, x, y, template):
+        if len(games) == 0:
+            return
+        height, width = template.shape
+        rows, row_w = _resample_weights(self.rows, y, height)
+        cols, col_w = _resample_weights(self.cols, x, width)
+        # rows of all sprites through the template in one matmul, then each
+        # sprite's columns
+        partial = (row_w.reshape(-1, height) @ template).reshape(len(games), -1, width)
+        blocks = partial @ col_w.transpose(0, 2, 1)
+        cells = (games[:, None, None] * OBS_SIZE + rows[:, :, None]) * OBS_SIZE + cols[:, None, :]
+        np.add.at(frame, cells.ravel(), blocks.ravel())
+
+
+def _padded(matrix):
+    # (84, size) area matrix with PAD zero rows below and zero columns on
+    # both sides, so windows of it may run off the screen
+    rows, size = matrix.shape
+    padded = np.zeros((rows + PAD, size + 2 * PAD), dtype=matrix.dtype)
+    padded[:rows, PAD:PAD + size] = matrix
+    return padded
+
+
+def _resample_weights(padded, start, extent):
+    # For sprites covering source pixels [start, start + extent): the output
+    # cells each one can touch and, per cell, the weight of every sprite
+    # pixel; off-screen pixels and cells weigh 0
+    size = padded.shape[1] - 2 * PAD
+    n = -(-extent * OBS_SIZE // size) + 1
+    first = np.clip(start, 0, size - 1) * OBS_SIZE // size
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (n, extent))
+    # a sprite entirely off one side reads only padding
+    weights = windows[first, np.clip(start, -extent, size) + PAD]
+    cells = np.minimum(first[:, None] + np.arange(n), OBS_SIZE - 1)
+    return cells, weights
+
+
+class GalacticShooterVectorEnv(VectorEnv):
+    metadata = {"autoreset_mode": AutoresetMode.SAME_STEP}
+
+    def __init__(self, num_envs=64, seed=None, frame_skip=1, frame_stack=1, **engine_kwargs):
+        super().__init__()
+        self.num_envs = num_envs
+        self.engine = VecGalacticShooter(num_envs, seed=seed, **engine_kwargs)
+        # as in model.GalacticShooterEnv: every action is repeated for
+        # frame_skip ticks and only the last tick is observed; with
+        # frame_stack > 1 the observation holds the last frame_stack frames
+        self.frame_skip = frame_skip
+        self.frames = FrameStack(frame_stack, (num_envs, OBS_SIZE, OBS_SIZE)) if frame_stack > 1 else None
+        self.single_action_space = gym.spaces.Discrete(4)
+        self.single_observation_space = gym.spaces.Box(low=0, high=255, shape=(OBS_SIZE, OBS_SIZE, frame_stack),
+                                                        dtype=np.uint8)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self._obs = np.zeros((num_envs, OBS_SIZE, OBS_SIZE, 1), dtype=np.uint8)
+        # last frame and score of games that end before the last skipped tick
+        self._final = np.zeros_like(self._obs)
+        self._scratch = np.zeros_like(self._obs)
+        self._final_score = np.zeros(num_envs, dtype=np.int32)
+
+    def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self.engine.seed(seed)
+        self.engine.reset()
+        frame = self.engine.render_obs(self._obs)
+        return (self.frames.reset(frame) if self.frames is not None else frame.copy()), {}
+
+    def step(self, actions):
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        early = np.zeros(self.num_envs, dtype=bool)
+        for tick in range(self.frame_skip):
+            tick_rewards, tick_terminated = self.engine.step(actions)
+            rewards += np.where(terminated, 0, tick_rewards)
+            ended = tick_terminated & ~terminated
+            terminated |= tick_terminated
+            if ended.any() and tick < self.frame_skip - 1:
+                # a finished game is stepped along with the rest until the
+                # last tick, so what it ended with is kept now
+                self.engine.render_obs(self._scratch)
+                self._final[ended] = self._scratch[ended]
+                self._final_score[ended] = self.engine.score[ended]
+                early |= ended
+        frame = self.engine.render_obs(self._obs)
+        frame[early] = self._final[early]
+        obs = self.frames.push(frame) if self.frames is not None else frame.copy()
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        infos = {}
+        if terminated.any():
+            # same-step autoreset: the finished games restart right away and
+            # their last observation is handed back in final_obs
+            infos["final_obs"] = obs
+            infos["_final_obs"] = terminated.copy()
+            infos["score"] = np.where(early, self._final_score, self.engine.score)
+            infos["_score"] = terminated.copy()
+            self.engine.reset(terminated)
+            frame = self.engine.render_obs(self._obs)
+            if self.frames is not None:
+                obs = self.frames.reset(frame, terminated)
+            else:
+                obs = frame.copy()
+        return obs, rewards, terminated, truncated, infos
+
+
+class SB3VecEnv(VecEnv):
+    # Adapter that lets stable-baselines3 drive a GalacticShooterVectorEnv
+    # directly, without per-env Python objects
+    def __init__(self, venv):
+        self.venv = venv
+        self.render_mode = None
+        super().__init__(venv.num_envs, venv.single_observation_space, venv.single_action_space)
+        self._actions = None
+
+    def reset(self):
+        seed = self._seeds[0]
+        obs, _ = self.venv.reset(seed=seed)
+        self._reset_seeds()
+        return obs
+
+    def step_async(self, actions):
+        self._actions = actions
+
+    def step_wait(self):
+        obs, rewards, terminated, truncated, infos = self.venv.step(self._actions)
+        dones = terminated | truncated
+        buf_infos = [{} for _ in range(self.num_envs)]
+        for i in np.flatnonzero(dones):
+            buf_infos[i]["terminal_observation"] = infos["final_obs"][i]
+            buf_infos[i]["TimeLimit.truncated"] = bool(truncated[i] and not terminated[i])
+        return obs, rewards, dones, buf_infos
+
+    def close(self):
+        self.venv.close()
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        # all games share one engine: the method runs once on the vector env
+        # and every requested index gets its result
+        result = getattr(self.venv, method_name)(*method_args, **method_kwargs)
+        return [result for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]